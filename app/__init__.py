@@ -1,8 +1,12 @@
 import os
 from flask import Flask
 from .extensions import db, login_manager
-from .models import User
+from .database import init_database
 from .firebase_utils import init_firebase
+from .passwords import init_password_hashing
+from .push import init_push
+from .images import init_images
+from .live import init_live
 
 def create_app():
     app = Flask(__name__)
@@ -13,15 +17,22 @@ def create_app():
 
     # Init Extensions
     db.init_app(app)
+    init_database(app)
     login_manager.init_app(app)
     init_firebase(app)
+    init_password_hashing(app)
+    init_push(app)
+    init_images(app)
+    init_live(app)
     
     from .utils import strip_clan_tag
     app.jinja_env.filters['strip_clan_tag'] = strip_clan_tag
 
+    from .user_cache import load_cached_user
+
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return load_cached_user(int(user_id))
 
     # Blueprints registrieren
     from app.routes.auth import auth_bp
@@ -42,4 +53,7 @@ def create_app():
     app.register_blueprint(api_bp)
     app.register_blueprint(tickets)
 
+    from .commands import register_commands
+    register_commands(app)
+
     return app
\ No newline at end of file
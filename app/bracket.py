@@ -0,0 +1,140 @@
+import heapq
+from itertools import count
+
+from .models import Match
+from .utils import sum_scores
+
+TBD = 'TBD'
+BYE = 'BYE'
+
+
+def bracket_size(entrant_count):
+    """Nächste Zweierpotenz (mind. 2) – fehlende Plätze werden mit Freilosen gefüllt."""
+    return 1 << max(1, (entrant_count - 1).bit_length())
+
+
+def seed_order(size):
+    """
+    Setzpositionen der ersten Runde (1-basiert), z.B. 8 -> [1, 8, 4, 5, 2, 7, 3, 6]:
+    Seed 1 und 2 treffen frühestens im Finale aufeinander, Freilose gehen an die Top-Seeds.
+    """
+    order = [1]
+    while len(order) < size:
+        n = len(order) * 2
+        order = [s for x in order for s in (x, n + 1 - x)]
+    return order
+
+
+def build_bracket(tournament, entrants):
+    """
+    Baut den kompletten Single-Elimination-Baum im Speicher und hängt ihn an `tournament`.
+    entrants in Setzreihenfolge (Index 0 = Seed 1). Die next_match-Links werden als
+    Relationship gesetzt, der nächste Flush vergibt alle IDs auf einmal. Kein Commit.
+    Gibt die Matches nach Runden gruppiert zurück.
+    """
+    if len(entrants) < 2:
+        raise ValueError("Ein Turnier braucht mindestens 2 Teams.")
+
+    size = bracket_size(len(entrants))
+    slots = [entrants[s - 1] if s <= len(entrants) else BYE for s in seed_order(size)]
+
+    first = [Match(team_a=slots[i], team_b=slots[i + 1],
+                   state='ban_1_a', round_number=1, match_index=i // 2)
+             for i in range(0, size, 2)]
+    rounds = [first]
+    while len(rounds[-1]) > 1:
+        prev = rounds[-1]
+        curr = [Match(team_a=TBD, team_b=TBD, state='waiting',
+                      round_number=len(rounds) + 1, match_index=i)
+                for i in range(len(prev) // 2)]
+        for m in prev:
+            m.next_match = curr[m.match_index // 2]
+        rounds.append(curr)
+
+    # Freilose sofort entscheiden: Seeds gegen BYE stehen direkt in Runde 2
+    byes = [m for m in first if _settle_bye(m)]
+    propagate(byes)
+
+    for r in rounds:
+        tournament.matches.extend(r)
+    return rounds
+
+
+# --- PROPAGATION ---
+
+def match_winner(match):
+    """Sieger eines beendeten Matches oder None (offen / kein Sieger bestimmbar)."""
+    if match.state != 'finished':
+        return None
+    if match.walkover == 'a': return match.team_a
+    if match.walkover == 'b': return match.team_b
+    if match.team_b == BYE: return match.team_a if match.team_a not in (TBD, BYE) else None
+    if match.team_a == BYE: return match.team_b if match.team_b != TBD else None
+
+    wa, wb = match.get_map_wins()
+    if wa > wb: return match.team_a
+    if wb > wa: return match.team_b
+    # Gleichstand nach Maps: Gesamtpunkte entscheiden (bei Gleichheit wie bisher Team B)
+    return match.team_a if sum_scores(match.get_scores_a()) > sum_scores(match.get_scores_b()) else match.team_b
+
+
+def _settle_bye(match):
+    """Entscheidet ein Match gegen ein Freilos. True, wenn es dadurch beendet ist."""
+    teams = (match.team_a, match.team_b)
+    if BYE in teams and TBD not in teams and teams != (BYE, BYE):
+        match.state = 'finished'
+        return True
+    return False
+
+
+def _reset(match):
+    """Neu besetztes Match: Spielstand der alten Paarung verwerfen und Phase neu bestimmen."""
+    if match.state not in ('waiting', 'ban_1_a') or match.vetoes:
+        match.scores_a = '[]'
+        match.scores_b = '[]'
+        match.lobby_code = None
+        match.evidence_a = None
+        match.evidence_b = None
+        match.vetoes.clear()
+    match.walkover = None
+    if not _settle_bye(match):
+        match.state = 'waiting' if TBD in (match.team_a, match.team_b) else 'ban_1_a'
+
+
+def propagate(matches):
+    """
+    Überträgt die Sieger von `matches` in ihre Folge-Matches. Ändert sich dadurch die
+    Besetzung eines Folge-Matches (Neubewertung, Walkover, Freilos), wird es zurückgesetzt
+    und die Änderung weiter nach oben getragen. Alles in der laufenden Transaktion –
+    Commit (oder Rollback) beim Aufrufer.
+    Gibt die geänderten Folge-Matches zurück, sortiert nach Runde.
+    """
+    tie = count()
+    # Untere Runden zuerst: eine Korrektur weiter unten überschreibt alles darüber
+    queue = [(m.round_number, m.match_index, next(tie), m) for m in matches]
+    heapq.heapify(queue)
+    changed = []
+    while queue:
+        *_, m = heapq.heappop(queue)
+        nm = m.next_match
+        if nm is None:
+            continue
+        slot = 'team_a' if m.match_index % 2 == 0 else 'team_b'
+        winner = match_winner(m) or TBD
+        if getattr(nm, slot) == winner:
+            continue
+        setattr(nm, slot, winner)
+        _reset(nm)
+        if nm not in changed:
+            changed.append(nm)
+        heapq.heappush(queue, (nm.round_number, nm.match_index, next(tie), nm))
+    return sorted(changed, key=lambda x: (x.round_number, x.match_index))
+
+
+def recalculate_tournament(tournament):
+    """Kompletter Abgleich eines Baums (z.B. nach Sammelkorrekturen oder Alt-Turnieren)."""
+    matches = list(tournament.matches)
+    for m in matches:
+        if m.state != 'finished':
+            _settle_bye(m)
+    return propagate(matches)
@@ -0,0 +1,45 @@
+import click
+from .extensions import db
+
+
+def register_commands(app):
+    @app.cli.command('rebuild-standings')
+    @click.argument('league_id', required=False, type=int)
+    def rebuild_standings(league_id):
+        """Baut die Ligatabellen komplett aus den Matches neu auf (alle Ligen oder eine)."""
+        from .models import League
+        from .standings import rebuild_league_standings
+        leagues = [League.query.get(league_id)] if league_id else League.query.all()
+        if None in leagues:
+            raise click.ClickException(f"Liga {league_id} nicht gefunden.")
+        for league in leagues:
+            rebuild_league_standings(league)
+            print(f"✅ Tabelle für '{league.name}' neu berechnet.")
+        db.session.commit()
+
+    @app.cli.command('optimize-images')
+    def optimize_images():
+        """Überführt vorhandene Logos und Map-Bilder in die Upload-Pipeline (Content-Hash + WebP-Renditions)."""
+        import os
+        from .images import HASHED_NAME, InvalidImage, _folder, processor, store_image
+        from .models import Clan, Map, User
+        converted = skipped = 0
+        for model, column, kind in ((Map, 'image_file', 'map_images'), (User, 'logo_file', 'logos'),
+                                    (Clan, 'logo_file', 'logos')):
+            for obj in model.query.filter(getattr(model, column).isnot(None)):
+                filename = getattr(obj, column)
+                path = os.path.join(_folder(kind), filename)
+                if HASHED_NAME.match(filename) or not os.path.exists(path):
+                    skipped += 1
+                    continue
+                with open(path, 'rb') as f:
+                    data = f.read()
+                try:
+                    setattr(obj, column, store_image(data, kind))
+                    converted += 1
+                except InvalidImage:
+                    print(f"⚠️ {path} ist kein gültiges Bild – übersprungen.")
+                    skipped += 1
+        db.session.commit()
+        processor.shutdown()  # auf laufende Renditions warten
+        print(f"✅ {converted} Bilder umgestellt, {skipped} übersprungen. Alte Dateien bleiben liegen.")
@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app
+from sqlalchemy import event, func, inspect, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from .extensions import db
+from .models import Tournament, Cup, League
+
+DashboardItem = namedtuple('DashboardItem', 'id name')
+
+COMPETITIONS = (('tournament', Tournament), ('cup', Cup), ('league', League))
+COMPETITION_MODELS = tuple(model for _, model in COMPETITIONS)
+
+
+class DashboardCache:
+    """
+    Prozessweiter Cache der Dashboard-Übersicht pro (Rolle, Archiv-Seite).
+    Jeder Eintrag merkt sich den Stand der Wettbewerbstabellen (_probe_query); weicht der
+    aktuelle Stand ab (Anlegen, Löschen, Archivieren – auch in anderen Worker-Prozessen),
+    gilt der Eintrag als veraltet. Umbenennungen leert der Commit im eigenen Prozess,
+    andere Worker sehen sie nach der TTL.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key, probe, ttl):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry[1] == probe and time.monotonic() - entry[0] < ttl:
+            return entry[2]
+        return None
+
+    def set(self, key, probe, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), probe, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+cache = DashboardCache()
+
+
+def _role(user):
+    if user.is_admin: return 'admin'
+    if user.is_mod: return 'mod'
+    return 'user'
+
+
+def _probe_query():
+    """Anzahl, höchste ID und Anzahl archivierter Einträge je Wettbewerbsart (ein Statement)."""
+    return union_all(*(
+        select(literal(kind).label('kind'), func.count(), func.max(model.id),
+               func.count().filter(model.is_archived == True))
+        for kind, model in COMPETITIONS
+    ))
+
+
+def _summary_query(page, page_size):
+    """Aktive + eine Seite archivierter Wettbewerbe aller drei Arten inkl. Anzahl, als EIN Statement."""
+    parts = []
+    for kind, model in COMPETITIONS:
+        archived = func.coalesce(model.is_archived, False)
+        parts.append(select(
+            literal(kind).label('kind'), model.id, model.name, archived.label('archived'),
+            func.count().over(partition_by=archived).label('total'),
+            func.row_number().over(partition_by=archived, order_by=model.id.desc()).label('pos'),
+        ))
+    sub = union_all(*parts).subquery()
+    first = page * page_size
+    return (select(sub.c.kind, sub.c.id, sub.c.name, sub.c.archived, sub.c.total)
+            .where((sub.c.archived == False) | sub.c.pos.between(first + 1, first + page_size))
+            .order_by(sub.c.kind, sub.c.id))
+
+
+def get_dashboard_summary(user, page=0):
+    """
+    Übersicht für das Dashboard: {'active': {kind: [DashboardItem]}, 'archived': {...},
+    'archived_total': int, 'page': int, 'pages': int}. Plain Tuples, daher cachebar.
+    """
+    page_size = current_app.config['DASHBOARD_ARCHIVE_PAGE_SIZE']
+    key = (_role(user), page)
+    probe = tuple(sorted(tuple(row) for row in db.session.execute(_probe_query())))
+    summary = cache.get(key, probe, current_app.config['DASHBOARD_CACHE_SECONDS'])
+    if summary is not None:
+        return summary
+
+    active = {kind: [] for kind, _ in COMPETITIONS}
+    archived = {kind: [] for kind, _ in COMPETITIONS}
+    archived_counts = {kind: 0 for kind, _ in COMPETITIONS}
+    for kind, id_, name, is_archived, total in db.session.execute(_summary_query(page, page_size)):
+        if is_archived:
+            archived[kind].append(DashboardItem(id_, name))
+            archived_counts[kind] = total
+        else:
+            active[kind].append(DashboardItem(id_, name))
+
+    # Seiten gelten pro Art; die längste Archivliste bestimmt die Seitenzahl
+    longest = max(archived_counts.values())
+    summary = {
+        'active': active,
+        'archived': archived,
+        'archived_total': sum(archived_counts.values()),
+        'page': page,
+        'pages': max(1, -(-longest // page_size)),
+    }
+    cache.set(key, probe, summary)
+    return summary
+
+
+def _affects_dashboard(session):
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, COMPETITION_MODELS):
+            return True
+    for obj in session.dirty:
+        if isinstance(obj, COMPETITION_MODELS):
+            attrs = inspect(obj).attrs
+            if attrs.is_archived.history.has_changes() or attrs.name.history.has_changes():
+                return True
+    return False
+
+
+@event.listens_for(Session, 'after_flush')
+def _mark_dashboard_dirty(session, flush_context):
+    if _affects_dashboard(session):
+        session.info['dashboard_dirty'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_dashboard(session):
+    if session.info.pop('dashboard_dirty', False):
+        cache.clear()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_dashboard_dirty(session):
+    session.info.pop('dashboard_dirty', None)
@@ -0,0 +1,55 @@
+from flask import flash, jsonify, redirect, request
+from sqlalchemy import event
+from sqlalchemy.orm.exc import StaleDataError
+
+from .extensions import db
+
+CONFLICT_MESSAGE = 'Das Match wurde gerade parallel geändert – bitte erneut versuchen.'
+
+
+def sqlite_pragmas(config):
+    """PRAGMAs für jede neue SQLite-Verbindung, in Ausführungsreihenfolge."""
+    return [
+        ('journal_mode', config['SQLITE_JOURNAL_MODE']),
+        ('busy_timeout', config['SQLITE_BUSY_TIMEOUT']),
+        ('synchronous', config['SQLITE_SYNCHRONOUS']),
+        ('cache_size', config['SQLITE_CACHE_SIZE']),
+        ('mmap_size', config['SQLITE_MMAP_SIZE']),
+    ]
+
+
+def wants_json():
+    """Request kommt per fetch (JSON-Body oder Accept: application/json) statt als Formular."""
+    return request.is_json or request.accept_mimetypes.best == 'application/json'
+
+
+def init_database(app):
+    """
+    Konflikt-Antwort für Optimistic Locking (state_version der Matches, siehe models.py):
+    409 für die Lobby-JS, die dann erneut sendet, sonst Flash + Redirect auf die Seite.
+
+    Verbindungs-Tuning für SQLite: WAL (Leser blockieren Schreiber nicht mehr und umgekehrt),
+    busy_timeout (gleichzeitige Schreiber warten statt "database is locked"),
+    synchronous=NORMAL (in WAL sicher, fsync nur beim Checkpoint), Page-Cache und mmap.
+    """
+    @app.errorhandler(StaleDataError)
+    def match_conflict(e):
+        db.session.rollback()
+        if wants_json():
+            return jsonify({'status': 'conflict', 'msg': CONFLICT_MESSAGE}), 409
+        flash(CONFLICT_MESSAGE, 'warning')
+        return redirect(request.url)
+
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+
+    pragmas = sqlite_pragmas(app.config)
+
+    @event.listens_for(engine, 'connect')
+    def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
@@ -1,34 +1,102 @@
-import firebase_admin
-from firebase_admin import credentials, messaging
-from flask import current_app
 import os
+import threading
+import time
+
+# firebase_admin (plus google-auth, grpc, ...) is imported on the first send, not at
+# startup: the import tree costs more than the rest of the app together and most workers
+# never send a notification.
 
 _firebase_app = None
+_cred_path = None
+_initialized = False
+_init_lock = threading.Lock()
+
+# Ergebnis pro Token beim Multicast-Versand
+SENT, INVALID, RETRY, SKIPPED = 'sent', 'invalid', 'retry', 'skipped'
 
 def init_firebase(app):
     """
-    Initializes the Firebase Admin SDK.
+    Registers the Firebase credentials for lazy initialization.
     Requires FIREBASE_CREDENTIALS in app config pointing to the serviceAccountKey.json.
+    The Admin SDK itself is imported and initialized by the first send (_get_firebase_app).
     """
-    global _firebase_app
+    global _firebase_app, _cred_path, _initialized
     cred_path = app.config.get('FIREBASE_CREDENTIALS')
-    
+
+    with _init_lock:
+        _firebase_app = None
+        _cred_path = cred_path
+        _initialized = False
+
     if not cred_path or not os.path.exists(cred_path):
         print(f"⚠️ Firebase Credentials not found at: {cred_path}")
-        return
 
+def _get_firebase_app():
+    """Imports and initializes the Admin SDK once (thread-safe). None without credentials."""
+    global _firebase_app, _initialized
+    if _initialized:
+        return _firebase_app
+
+    with _init_lock:
+        if _initialized:
+            return _firebase_app
+        _initialized = True
+        if not _cred_path or not os.path.exists(_cred_path):
+            return None
+
+        try:
+            start = time.perf_counter()
+            import firebase_admin
+            from firebase_admin import credentials
+            try:
+                _firebase_app = firebase_admin.get_app()
+            except ValueError:
+                _firebase_app = firebase_admin.initialize_app(credentials.Certificate(_cred_path))
+            print(f"✅ Firebase Admin SDK initialized ({(time.perf_counter() - start) * 1000:.0f} ms).")
+        except Exception as e:
+            print(f"❌ Failed to initialize Firebase: {e}")
+        return _firebase_app
+
+def _classify(exc):
+    """Ergebnis für den Fehler EINES Tokens (Einzelantwort im Multicast)."""
+    from firebase_admin import exceptions, messaging
+
+    # Token gehört zu keinem (gültigen) Gerät mehr -> aus der DB entfernen
+    if isinstance(exc, (messaging.UnregisteredError, messaging.SenderIdMismatchError,
+                        exceptions.InvalidArgumentError, exceptions.NotFoundError)):
+        return INVALID
+    # Alles andere (Quota, Unavailable, Internal, Timeout, ...) -> später erneut versuchen
+    return RETRY
+
+def send_multicast(tokens, title, body, data=None):
+    """
+    Sends one notification to up to 500 device tokens in a single FCM request.
+    Returns one of SENT / INVALID / RETRY / SKIPPED per token (same order).
+    """
+    if not _get_firebase_app():
+        print("⚠️ Firebase not initialized. Skipping notification.")
+        return [SKIPPED] * len(tokens)
+
+    from firebase_admin import exceptions, messaging
+    message = messaging.MulticastMessage(
+        notification=messaging.Notification(title=title, body=body),
+        data=data,
+        tokens=list(tokens),
+    )
     try:
-        cred = credentials.Certificate(cred_path)
-        _firebase_app = firebase_admin.initialize_app(cred)
-        print("✅ Firebase Admin SDK initialized.")
-    except Exception as e:
-        print(f"❌ Failed to initialize Firebase: {e}")
+        response = messaging.send_each_for_multicast(message)
+    except exceptions.FirebaseError as e:
+        # Fehler des ganzen Requests (Payload, Auth, Quota, Netz) sagt nichts über die einzelnen
+        # Tokens aus -> nie als INVALID werten (würde alle Tokens löschen), später erneut versuchen
+        print(f"❌ Error sending notifications: {e}")
+        return [RETRY] * len(tokens)
+    return [SENT if r.success else _classify(r.exception) for r in response.responses]
 
 def send_push_notification(token, title, body, data=None):
     """
     Sends a push notification to a specific device token.
     """
-    if not _firebase_app:
+    if not _get_firebase_app():
         print("⚠️ Firebase not initialized. Skipping notification.")
         return False
 
@@ -36,6 +104,7 @@ def send_push_notification(token, title, body, data=None):
         return False
 
     try:
+        from firebase_admin import messaging
         message = messaging.Message(
             notification=messaging.Notification(
                 title=title,
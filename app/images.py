@@ -0,0 +1,173 @@
+import hashlib
+import io
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, request, url_for
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Erlaubte Formate (von Pillow erkannt, nicht anhand der Dateiendung) -> Endung des Originals
+FORMATS = {'PNG': 'png', 'JPEG': 'jpg', 'GIF': 'gif', 'WEBP': 'webp'}
+
+# <hash>.<ext> (Original) bzw. <hash>-<breite>.webp (Rendition)
+HASHED_NAME = re.compile(r'^([0-9a-f]{16})(?:-(\d+))?\.(png|jpg|gif|webp)$')
+
+
+class InvalidImage(Exception):
+    """Upload ist kein (unterstütztes) Bild."""
+
+
+class ImageProcessor:
+    """
+    Speichert Uploads unter ihrem Content-Hash und rechnet die WebP-Renditions in einem
+    begrenzten Thread-Pool, damit Requests nicht auf das Skalieren großer Bilder warten.
+    Bis eine Rendition fertig ist, liefern die Templates das Original aus.
+    workers=0 rechnet direkt im Request (Entwicklung, CLI).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pool = None
+        self._ready = set()
+        self.workers = 0
+        self.quality = 80
+
+    def configure(self, workers, quality):
+        self.shutdown()
+        self.workers = workers
+        self.quality = quality
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='images')
+            return self._pool
+
+    def submit(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        return self._executor().submit(fn, *args)
+
+    def is_ready(self, path):
+        """Rendition vorhanden? Content-Hash-Dateien ändern sich nie, Treffer werden gemerkt."""
+        if path in self._ready:
+            return True
+        if os.path.exists(path):
+            self._ready.add(path)
+            return True
+        return False
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+
+processor = ImageProcessor()
+
+
+def _folder(kind):
+    config = current_app.config
+    return config['LOGO_UPLOAD_FOLDER'] if kind == 'logos' else config['UPLOAD_FOLDER']
+
+
+def validate_image(data, max_pixels):
+    """Prüft, ob `data` ein unterstütztes Bild ist. Gibt die Endung für das Original zurück."""
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            fmt = img.format
+            width, height = img.size
+            img.verify()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError, ValueError):
+        raise InvalidImage()
+    if fmt not in FORMATS or width * height > max_pixels:
+        raise InvalidImage()
+    return FORMATS[fmt]
+
+
+def _render(data, folder, digest, widths, quality):
+    """Schreibt <digest>-<breite>.webp für alle Breiten (nie hochskaliert, atomar ersetzt)."""
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img = ImageOps.exif_transpose(img)
+            img = img.convert('RGBA' if img.mode in ('RGBA', 'LA', 'P') else 'RGB')
+            for width in widths:
+                path = os.path.join(folder, f"{digest}-{width}.webp")
+                if os.path.exists(path):
+                    continue
+                rendition = img.copy()
+                if rendition.width > width:
+                    rendition = rendition.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+                tmp = f"{path}.{threading.get_ident()}.tmp"
+                rendition.save(tmp, 'WEBP', quality=quality, method=4)
+                os.replace(tmp, path)
+    except Exception as e:
+        print(f"❌ Bildverarbeitung für {digest} fehlgeschlagen: {e}")
+
+
+def store_image(file_or_bytes, kind):
+    """
+    Validiert einen Upload und legt ihn als <content-hash>.<ext> im Ordner von `kind`
+    ('logos' oder 'map_images') ab. Die Renditions werden im Hintergrund erzeugt.
+    Gibt den Dateinamen für die DB zurück; InvalidImage bei ungültigen Dateien.
+    """
+    config = current_app.config
+    data = file_or_bytes if isinstance(file_or_bytes, bytes) else file_or_bytes.read()
+    ext = validate_image(data, config['IMAGE_MAX_PIXELS'])
+
+    folder = _folder(kind)
+    os.makedirs(folder, exist_ok=True)
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    filename = f"{digest}.{ext}"
+    path = os.path.join(folder, filename)
+    if not os.path.exists(path):
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    processor.submit(_render, data, folder, digest, sorted(config['IMAGE_SIZES'][kind].values()),
+                     processor.quality)
+    return filename
+
+
+def image_url(kind, filename, size='small'):
+    """
+    URL für ein Logo/Map-Bild in der gewünschten Größe. Alt-Dateien (ohne Content-Hash)
+    und noch nicht gerechnete Renditions fallen auf das Original zurück.
+    """
+    if not filename:
+        return None
+    match = HASHED_NAME.match(filename)
+    if match and not match.group(2):
+        width = current_app.config['IMAGE_SIZES'][kind][size]
+        rendition = f"{match.group(1)}-{width}.webp"
+        if processor.is_ready(os.path.join(_folder(kind), rendition)):
+            filename = rendition
+    return url_for('static', filename=f"{kind}/{filename}")
+
+
+def logo_url(filename, size='small'):
+    return image_url('logos', filename, size)
+
+
+def map_url(filename, size='small'):
+    return image_url('map_images', filename, size)
+
+
+def init_images(app):
+    config = app.config
+    processor.configure(config['IMAGE_WORKERS'], config['IMAGE_WEBP_QUALITY'])
+    app.jinja_env.globals.update(logo_url=logo_url, map_url=map_url)
+
+    @app.after_request
+    def cache_hashed_images(response):
+        # Content-Hash im Namen -> Inhalt ändert sich nie, Browser darf ein Jahr cachen
+        if request.endpoint == 'static' and response.status_code in (200, 304) and \
+                HASHED_NAME.match(os.path.basename(request.view_args.get('filename', ''))):
+            response.cache_control.public = True
+            response.cache_control.max_age = 31536000
+            response.cache_control.immutable = True
+            response.cache_control.no_cache = None
+        return response
@@ -0,0 +1,104 @@
+import threading
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class MatchEventBus:
+    """
+    Prozessweiter Benachrichtigungs-Bus für Live-Streams (SSE).
+    Pro Match wird ein Zähler hochgezählt; wartende Streams wachen auf und
+    laden den neuen Stand. Änderungen aus anderen Worker-Prozessen erkennen
+    die Streams über ihren Re-Check alle SSE_POLL_SECONDS.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._counters = {}
+
+    def current(self, key):
+        with self._cond:
+            return self._counters.get(key, 0)
+
+    def publish(self, keys):
+        if not keys:
+            return
+        with self._cond:
+            for key in keys:
+                self._counters[key] = self._counters.get(key, 0) + 1
+            self._cond.notify_all()
+
+    def wait(self, key, seen, timeout):
+        """Blockiert bis sich der Zähler von `key` ändert oder `timeout` abläuft. Gibt den Zähler zurück."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._counters.get(key, 0) != seen, timeout=timeout)
+            return self._counters.get(key, 0)
+
+
+bus = MatchEventBus()
+
+
+class StreamLimiter:
+    """
+    Begrenzt die gleichzeitig offenen Live-Streams pro Prozess. Jeder Stream belegt einen
+    gthread-Thread; ohne Grenze würden Zuschauer alle Threads blockieren und normale Requests
+    (Klicks, Seitenaufrufe) verhungern. Wer keinen Platz bekommt, pollt stattdessen.
+    limit=0 = unbegrenzt.
+    """
+
+    def __init__(self):
+        self._slots = None
+        self.limit = 0
+
+    def configure(self, limit):
+        self.limit = limit
+        self._slots = threading.BoundedSemaphore(limit) if limit else None
+
+    def acquire(self):
+        return self._slots is None or self._slots.acquire(blocking=False)
+
+    def release(self):
+        if self._slots is not None:
+            self._slots.release()
+
+
+streams = StreamLimiter()
+
+
+def init_live(app):
+    streams.configure(app.config['SSE_MAX_STREAMS'])
+
+
+def _match_key(obj):
+    """Ordnet ein geändertes Objekt dem Live-Kanal seines Matches zu."""
+    from .models import (Match, CupMatch, LeagueMatch, MapVeto,
+                         ChatMessage, CupChatMessage, LeagueChatMessage)
+    if isinstance(obj, Match): return ('match', obj.id)
+    if isinstance(obj, CupMatch): return ('cup_match', obj.id)
+    if isinstance(obj, LeagueMatch): return ('league_match', obj.id)
+    if isinstance(obj, ChatMessage): return ('match', obj.match_id)
+    if isinstance(obj, CupChatMessage): return ('cup_match', obj.cup_match_id)
+    if isinstance(obj, LeagueChatMessage): return ('league_match', obj.league_match_id)
+    if isinstance(obj, MapVeto):
+        if obj.match_id: return ('match', obj.match_id)
+        if obj.cup_match_id: return ('cup_match', obj.cup_match_id)
+        if obj.league_match_id: return ('league_match', obj.league_match_id)
+    return None
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_live_keys(session, flush_context):
+    keys = session.info.setdefault('live_keys', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        key = _match_key(obj)
+        if key and key[1] is not None:
+            keys.add(key)
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_live_keys(session):
+    bus.publish(session.info.pop('live_keys', None))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_live_keys(session):
+    session.info.pop('live_keys', None)
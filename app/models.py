@@ -1,8 +1,12 @@
 from .extensions import db
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
 from flask_login import UserMixin
-from .utils import calculate_map_wins, safe_json_load, get_current_time, strip_clan_tag
+from .utils import calculate_map_wins, safe_json_load, get_current_time, strip_clan_tag, hash_token
+from .team_resolver import get_team_resolver
 from datetime import datetime
 import json
+import secrets
 
 class Clan(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -16,7 +20,8 @@ class User(UserMixin, db.Model):
     username = db.Column(db.String(150), unique=True, nullable=False)
     logo_file = db.Column(db.String(120), nullable=True) # Custom Team Logo
     password = db.Column(db.String(150), nullable=True)
-    token = db.Column(db.String(5), nullable=True)
+    token = db.Column(db.String(16), nullable=True) # Legacy-Klartext, von db_upgrade.py gehasht und geleert
+    token_hash = db.Column(db.String(64), nullable=True, index=True) # Login-Lookup, siehe hash_token
     fcm_token = db.Column(db.String(255), nullable=True) # Firebase Cloud Messaging Token
     
     # Rechte
@@ -34,6 +39,12 @@ class User(UserMixin, db.Model):
     def display_name(self):
         return strip_clan_tag(self.username)
 
+    def issue_token(self):
+        """Neues Login-Token: gespeichert wird nur der Hash, der Klartext wird einmalig angezeigt."""
+        token = secrets.token_hex(4)
+        self.token_hash = hash_token(token)
+        return token
+
 class TeamMember(db.Model):
     """Repräsentiert einen Spieler/Account in einem Roster (z.B. für verschiedene Games)"""
     id = db.Column(db.Integer, primary_key=True)
@@ -41,7 +52,7 @@ class TeamMember(db.Model):
     activision_id = db.Column(db.String(150), nullable=False)
     platform = db.Column(db.String(50), nullable=False)
     owner_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    banned_until = db.Column(db.DateTime, nullable=True) # Wenn Datum in Zukunft = Gebannt
+    banned_until = db.Column(db.DateTime, nullable=True, index=True) # Wenn Datum in Zukunft = Gebannt
     ban_reason = db.Column(db.String(200), nullable=True)
 
     @property
@@ -59,73 +70,147 @@ class Map(db.Model):
     image_file = db.Column(db.String(120), nullable=False, default='default.jpg')
     is_archived = db.Column(db.Boolean, default=False)
 
+class MapVeto(db.Model):
+    """Eine Pick/Ban-Aktion im Map-Veto. Append-only, Reihenfolge über seq."""
+    __table_args__ = (
+        db.Index('ix_map_veto_match', 'match_id', 'seq'),
+        db.Index('ix_map_veto_cup_match', 'cup_match_id', 'seq'),
+        db.Index('ix_map_veto_league_match', 'league_match_id', 'seq'),
+        db.Index('ix_map_veto_map_action', 'map_id', 'action'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    # Genau eine der drei Match-Referenzen ist gesetzt (wie bei den Chat-Tabellen)
+    match_id = db.Column(db.Integer, db.ForeignKey('match.id'), nullable=True)
+    cup_match_id = db.Column(db.Integer, db.ForeignKey('cup_match.id'), nullable=True)
+    league_match_id = db.Column(db.Integer, db.ForeignKey('league_match.id'), nullable=True)
+
+    seq = db.Column(db.Integer, nullable=False, default=0)
+    team = db.Column(db.String(1), nullable=True) # 'a' / 'b', None = Admin-Auswahl
+    action = db.Column(db.String(4), nullable=False) # 'ban' / 'pick'
+    map_id = db.Column(db.Integer, db.ForeignKey('map.id', ondelete='SET NULL'), nullable=True)
+    map_name = db.Column(db.String(100), nullable=False) # Snapshot, bleibt nach Löschen der Map erhalten
+    created_at = db.Column(db.DateTime, default=get_current_time)
+
+    @staticmethod
+    def stats():
+        """Matchübergreifend: {map_name: {'ban': n, 'pick': n}} mit einem GROUP BY."""
+        rows = db.session.query(MapVeto.map_name, MapVeto.action, func.count(MapVeto.id)) \
+            .group_by(MapVeto.map_name, MapVeto.action).all()
+        result = {}
+        for name, action, count in rows:
+            result.setdefault(name, {'ban': 0, 'pick': 0})[action] = count
+        return result
+
+class MapVetoMixin:
+    """Pick/Ban-Zugriff über die MapVeto-Zeilen statt JSON-Spalten."""
+    def get_banned(self): return [v.map_name for v in self.vetoes if v.action == 'ban']
+    def get_picked(self): return [v.map_name for v in self.vetoes if v.action == 'pick']
+
+    def add_veto(self, action, map_name, team=None):
+        # Kein Autoflush: der Handler hat match.state evtl. schon geändert, ein Zwischen-Flush
+        # wäre ein zweites UPDATE (und ein zweiter state_version-Sprung) pro Klick
+        with db.session.no_autoflush:
+            map_id = db.session.scalar(select(Map.id).where(Map.name == map_name))
+            seq = self.vetoes[-1].seq + 1 if self.vetoes else 0
+        self.vetoes.append(MapVeto(seq=seq, action=action, team=team, map_name=map_name, map_id=map_id))
+
+    def set_picks(self, map_names):
+        """Ersetzt alle Picks (Admin-Auswahl im Cup)."""
+        for v in [v for v in self.vetoes if v.action == 'pick']:
+            self.vetoes.remove(v)
+        for name in map_names:
+            if name: self.add_veto('pick', name)
+
 # --- MATCH MODELS ---
 
+class ParsedFieldsMixin:
+    """
+    Memoisiert geparste JSON-Spalten pro Instanz. Der Cache hängt an der Identität des
+    Rohwerts: Zuweisung an die Spalte (oder Neuladen nach Commit/Expire) ersetzt das
+    String-Objekt und invalidiert den Eintrag automatisch.
+    Die zurückgegebenen Listen werden geteilt und dürfen nicht verändert werden.
+    """
+    def _parsed_cache(self):
+        cache = self.__dict__.get('_parsed_fields')
+        if cache is None:
+            cache = self.__dict__['_parsed_fields'] = {}
+        return cache
+
+    def _parsed(self, column):
+        return self._derived(column, (column,), lambda: safe_json_load(getattr(self, column)))
+
+    def _derived(self, key, columns, compute):
+        raw = tuple(getattr(self, c) for c in columns)
+        cache = self._parsed_cache()
+        hit = cache.get(key)
+        if hit is not None and all(a is b for a, b in zip(hit[0], raw)):
+            return hit[1]
+        value = compute()
+        cache[key] = (raw, value)
+        return value
+
+class TeamIdentityMixin:
+    """Clan/Logo der Teams über den request-weiten TeamResolver (gebündelte Queries)."""
+    def is_participant(self, user):
+        """Integer-Vergleich über die FK-Spalten statt Username-Strings."""
+        return user.id is not None and user.id in (self.team_a_id, self.team_b_id)
+
+    @property
+    def team_a_clan(self): return get_team_resolver().clan(self.team_a)
+    @property
+    def team_b_clan(self): return get_team_resolver().clan(self.team_b)
+    @property
+    def team_a_logo(self): return get_team_resolver().logo(self.team_a)
+    @property
+    def team_b_logo(self): return get_team_resolver().logo(self.team_b)
+
 class Tournament(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     is_archived = db.Column(db.Boolean, default=False)
     matches = db.relationship('Match', backref='tournament', lazy=True, cascade="all, delete-orphan")
 
-class Match(db.Model):
+class Match(TeamIdentityMixin, MapVetoMixin, ParsedFieldsMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament.id'))
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament.id'), index=True)
     
     # Teams
     team_a = db.Column(db.String(100), nullable=False, default="TBD")
     team_b = db.Column(db.String(100), nullable=False, default="TBD")
+    team_a_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True, index=True)
+    team_b_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True, index=True)
     
     # Status & Meta
     state = db.Column(db.String(50), default='waiting') 
+    state_version = db.Column(db.Integer, nullable=False, default=1, server_default='1') # ETag / Live-Updates
+    __mapper_args__ = {'version_id_col': state_version, 'version_id_generator': False} # Compare-and-Swap
     lobby_code = db.Column(db.String(50), nullable=True)
     round_number = db.Column(db.Integer, default=1)
     match_index = db.Column(db.Integer, default=0)
-    next_match_id = db.Column(db.Integer, nullable=True)
+    next_match_id = db.Column(db.Integer, nullable=True, index=True)
+    # Baum-Verknüpfung ohne FK-Constraint: erlaubt das Setzen aller Links in einem Flush
+    next_match = db.relationship('Match', primaryjoin='foreign(Match.next_match_id) == remote(Match.id)',
+                                 backref=db.backref('feeders', order_by='Match.match_index'))
     
-    # Daten
-    banned_maps = db.Column(db.Text, default='[]') 
-    picked_maps = db.Column(db.Text, default='[]')
+    # Daten (Map-Veto liegt in MapVeto)
     scores_a = db.Column(db.Text, default='[]')
     scores_b = db.Column(db.Text, default='[]')
+    walkover = db.Column(db.String(1), nullable=True) # 'a'/'b' = kampfloser Sieger (Admin)
     
     # NEU: Beweis-Screenshots für Ergebnisse
     evidence_a = db.Column(db.String(150), nullable=True) # Dateipfad Bild Team A
     evidence_b = db.Column(db.String(150), nullable=True) # Dateipfad Bild Team B
     
     chat_messages = db.relationship('ChatMessage', backref='match', lazy=True, cascade="all, delete-orphan")
+    vetoes = db.relationship('MapVeto', backref='match', lazy=True, order_by='MapVeto.seq', cascade="all, delete-orphan")
+    team_a_user = db.relationship('User', foreign_keys=[team_a_id], lazy=True)
+    team_b_user = db.relationship('User', foreign_keys=[team_b_id], lazy=True)
 
-    def get_banned(self): return safe_json_load(self.banned_maps)
-    def get_picked(self): return safe_json_load(self.picked_maps)
-    def get_scores_a(self): return safe_json_load(self.scores_a)
-    def get_scores_b(self): return safe_json_load(self.scores_b)
-    def get_map_wins(self): return calculate_map_wins(self.get_scores_a(), self.get_scores_b())
+    def get_scores_a(self): return self._parsed('scores_a')
+    def get_scores_b(self): return self._parsed('scores_b')
+    def get_map_wins(self): return self._derived('map_wins', ('scores_a', 'scores_b'), lambda: calculate_map_wins(self.get_scores_a(), self.get_scores_b()))
     
-    @property
-    def team_a_clan(self):
-        u = User.query.filter_by(username=self.team_a).first()
-        return u.clan.name if u and u.clan else None
-    @property
-    def team_b_clan(self):
-        u = User.query.filter_by(username=self.team_b).first()
-        return u.clan.name if u and u.clan else None
-
-    @property
-    def team_a_logo(self):
-        u = User.query.filter_by(username=self.team_a).first()
-        if u:
-            if u.logo_file: return u.logo_file
-            if u.clan and u.clan.logo_file: return u.clan.logo_file
-        return None
-
-    @property
-    def team_b_logo(self):
-        u = User.query.filter_by(username=self.team_b).first()
-        if u:
-            if u.logo_file: return u.logo_file
-            if u.clan and u.clan.logo_file: return u.clan.logo_file
-        return None
-
-class Cup(db.Model):
+class Cup(ParsedFieldsMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     is_archived = db.Column(db.Boolean, default=False)
@@ -136,21 +221,26 @@ class Cup(db.Model):
     matches = db.relationship('CupMatch', backref='cup', lazy=True, cascade="all, delete-orphan")
     
     def get_participants(self): return safe_json_load(self.participants)
-    def get_rosters(self): return safe_json_load(self.rosters)
+    def get_rosters(self):
+        rosters = self._parsed('rosters')
+        return rosters if isinstance(rosters, dict) else {}
 
-class CupMatch(db.Model):
+class CupMatch(TeamIdentityMixin, MapVetoMixin, ParsedFieldsMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    cup_id = db.Column(db.Integer, db.ForeignKey('cup.id'), nullable=False)
+    cup_id = db.Column(db.Integer, db.ForeignKey('cup.id'), nullable=False, index=True)
     team_a = db.Column(db.String(100), nullable=False)
     team_b = db.Column(db.String(100), nullable=False)
+    team_a_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True, index=True)
+    team_b_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True, index=True)
     round_number = db.Column(db.Integer, default=1)
     state = db.Column(db.String(50), default='waiting_for_ready')
+    state_version = db.Column(db.Integer, nullable=False, default=1, server_default='1') # ETag / Live-Updates
+    __mapper_args__ = {'version_id_col': state_version, 'version_id_generator': False} # Compare-and-Swap
     lobby_code = db.Column(db.String(50), nullable=True)
     current_picker = db.Column(db.String(100), nullable=True)
     
     scores_a = db.Column(db.Text, default='[]')
     scores_b = db.Column(db.Text, default='[]')
-    picked_maps = db.Column(db.Text, default='[]')
     
     # NEU: Lineups & Bestätigung
     lineup_a = db.Column(db.Text, default='[]') # JSON Liste der Gamertags/IDs
@@ -158,44 +248,22 @@ class CupMatch(db.Model):
     confirmed_a = db.Column(db.Boolean, default=False) # Admin hat Team A bestätigt
     confirmed_b = db.Column(db.Boolean, default=False) # Admin hat Team B bestätigt
 
-    def get_lineup_a(self): return safe_json_load(self.lineup_a)
-    def get_lineup_b(self): return safe_json_load(self.lineup_b)
+    # Leeres Lineup = Kader aus cup.rosters (wird nicht mehr in jedes Match kopiert)
+    def get_lineup_a(self): return self._parsed('lineup_a') or self.cup.get_rosters().get(self.team_a, [])
+    def get_lineup_b(self): return self._parsed('lineup_b') or self.cup.get_rosters().get(self.team_b, [])
 
     # NEU: Beweis-Screenshots
     evidence_a = db.Column(db.String(150), nullable=True)
     evidence_b = db.Column(db.String(150), nullable=True)
     
     chat_messages = db.relationship('CupChatMessage', backref='cup_match', lazy=True, cascade="all, delete-orphan")
+    vetoes = db.relationship('MapVeto', backref='cup_match', lazy=True, order_by='MapVeto.seq', cascade="all, delete-orphan")
+    team_a_user = db.relationship('User', foreign_keys=[team_a_id], lazy=True)
+    team_b_user = db.relationship('User', foreign_keys=[team_b_id], lazy=True)
 
-    def get_picked(self): return safe_json_load(self.picked_maps)
-    def get_scores_a(self): return safe_json_load(self.scores_a)
-    def get_scores_b(self): return safe_json_load(self.scores_b)
-    def get_map_wins(self): return calculate_map_wins(self.get_scores_a(), self.get_scores_b())
-
-    @property
-    def team_a_clan(self):
-        u = User.query.filter_by(username=self.team_a).first()
-        return u.clan.name if u and u.clan else None
-    @property
-    def team_b_clan(self):
-        u = User.query.filter_by(username=self.team_b).first()
-        return u.clan.name if u and u.clan else None
-
-    @property
-    def team_a_logo(self):
-        u = User.query.filter_by(username=self.team_a).first()
-        if u:
-            if u.logo_file: return u.logo_file
-            if u.clan and u.clan.logo_file: return u.clan.logo_file
-        return None
-
-    @property
-    def team_b_logo(self):
-        u = User.query.filter_by(username=self.team_b).first()
-        if u:
-            if u.logo_file: return u.logo_file
-            if u.clan and u.clan.logo_file: return u.clan.logo_file
-        return None
+    def get_scores_a(self): return self._parsed('scores_a')
+    def get_scores_b(self): return self._parsed('scores_b')
+    def get_map_wins(self): return self._derived('map_wins', ('scores_a', 'scores_b'), lambda: calculate_map_wins(self.get_scores_a(), self.get_scores_b()))
 
 class League(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -204,25 +272,46 @@ class League(db.Model):
     participants = db.Column(db.Text, default='[]')
     start_date = db.Column(db.Date, nullable=True) # Start der Liga (Montag der ersten Woche)
     matches = db.relationship('LeagueMatch', backref='league', lazy=True, cascade="all, delete-orphan")
+    standings = db.relationship('LeagueStanding', backref='league', lazy=True, cascade="all, delete-orphan")
     def get_participants(self): return safe_json_load(self.participants)
 
-class LeagueMatch(db.Model):
+class LeagueStanding(db.Model):
+    """Materialisierte Tabellenzeile pro (Liga, Team); wird bei Match-Ende inkrementell gepflegt."""
+    __table_args__ = (db.UniqueConstraint('league_id', 'team', name='uq_league_standing_team'),)
+    id = db.Column(db.Integer, primary_key=True)
+    league_id = db.Column(db.Integer, db.ForeignKey('league.id'), nullable=False)
+    team = db.Column(db.String(100), nullable=False)
+    team_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
+
+    played = db.Column(db.Integer, nullable=False, default=0)
+    won_matches = db.Column(db.Integer, nullable=False, default=0)
+    lost_matches = db.Column(db.Integer, nullable=False, default=0)
+    draw_matches = db.Column(db.Integer, nullable=False, default=0)
+    own_score = db.Column(db.Integer, nullable=False, default=0)
+    opp_score = db.Column(db.Integer, nullable=False, default=0)
+
+class LeagueMatch(TeamIdentityMixin, MapVetoMixin, ParsedFieldsMixin, db.Model):
+    # (league_id, match_week) deckt auch reine league_id-Filter ab
+    __table_args__ = (db.Index('ix_league_match_league_week', 'league_id', 'match_week'),)
+
     id = db.Column(db.Integer, primary_key=True)
     league_id = db.Column(db.Integer, db.ForeignKey('league.id'), nullable=False)
     
     team_a = db.Column(db.String(100), nullable=False)
     team_b = db.Column(db.String(100), nullable=False)
+    team_a_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True, index=True)
+    team_b_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True, index=True)
     round_number = db.Column(db.Integer, default=1)
     match_week = db.Column(db.Integer, default=1) # Spielwoche (1, 2, 3...)
     scheduled_date = db.Column(db.DateTime, nullable=True) # Finaler Termin
     proposed_date_a = db.Column(db.DateTime, nullable=True) # Vorschlag Team A
     proposed_date_b = db.Column(db.DateTime, nullable=True) # Vorschlag Team B
     
-    state = db.Column(db.String(50), default='ban_1_a') 
+    state = db.Column(db.String(50), default='ban_1_a', index=True) 
+    state_version = db.Column(db.Integer, nullable=False, default=1, server_default='1') # ETag / Live-Updates
+    __mapper_args__ = {'version_id_col': state_version, 'version_id_generator': False} # Compare-and-Swap
     lobby_code = db.Column(db.String(50), nullable=True)
     
-    banned_maps = db.Column(db.Text, default='[]') 
-    picked_maps = db.Column(db.Text, default='[]')
     scores_a = db.Column(db.Text, default='[]')
     scores_b = db.Column(db.Text, default='[]')
     
@@ -246,44 +335,21 @@ class LeagueMatch(db.Model):
     evidence_b = db.Column(db.String(150), nullable=True)
 
     chat_messages = db.relationship('LeagueChatMessage', backref='league_match', lazy=True, cascade="all, delete-orphan")
-
-    def get_banned(self): return safe_json_load(self.banned_maps)
-    def get_picked(self): return safe_json_load(self.picked_maps)
-    def get_scores_a(self): return safe_json_load(self.scores_a)
-    def get_scores_b(self): return safe_json_load(self.scores_b)
-    def get_map_wins(self): return calculate_map_wins(self.get_scores_a(), self.get_scores_b())
-    def get_draft_lineup_a(self): return safe_json_load(self.draft_a_lineup)
-    def get_draft_lineup_b(self): return safe_json_load(self.draft_b_lineup)
-    def get_draft_scores_a(self): return safe_json_load(self.draft_a_scores)
-    def get_draft_scores_b(self): return safe_json_load(self.draft_b_scores)
-
-    @property
-    def team_a_clan(self):
-        u = User.query.filter_by(username=self.team_a).first()
-        return u.clan.name if u and u.clan else None
-    @property
-    def team_b_clan(self):
-        u = User.query.filter_by(username=self.team_b).first()
-        return u.clan.name if u and u.clan else None
-
-    @property
-    def team_a_logo(self):
-        u = User.query.filter_by(username=self.team_a).first()
-        if u:
-            if u.logo_file: return u.logo_file
-            if u.clan and u.clan.logo_file: return u.clan.logo_file
-        return None
-
-    @property
-    def team_b_logo(self):
-        u = User.query.filter_by(username=self.team_b).first()
-        if u:
-            if u.logo_file: return u.logo_file
-            if u.clan and u.clan.logo_file: return u.clan.logo_file
-        return None
+    vetoes = db.relationship('MapVeto', backref='league_match', lazy=True, order_by='MapVeto.seq', cascade="all, delete-orphan")
+    team_a_user = db.relationship('User', foreign_keys=[team_a_id], lazy=True)
+    team_b_user = db.relationship('User', foreign_keys=[team_b_id], lazy=True)
+
+    def get_scores_a(self): return self._parsed('scores_a')
+    def get_scores_b(self): return self._parsed('scores_b')
+    def get_map_wins(self): return self._derived('map_wins', ('scores_a', 'scores_b'), lambda: calculate_map_wins(self.get_scores_a(), self.get_scores_b()))
+    def get_draft_lineup_a(self): return self._parsed('draft_a_lineup')
+    def get_draft_lineup_b(self): return self._parsed('draft_b_lineup')
+    def get_draft_scores_a(self): return self._parsed('draft_a_scores')
+    def get_draft_scores_b(self): return self._parsed('draft_b_scores')
 
 # --- CHAT MODELS (Unverändert) ---
 class ChatMessage(db.Model):
+    __table_args__ = (db.Index('ix_chat_message_cursor', 'match_id', 'id'),)
     id = db.Column(db.Integer, primary_key=True)
     match_id = db.Column(db.Integer, db.ForeignKey('match.id'), nullable=False)
     username = db.Column(db.String(100), nullable=False)
@@ -293,6 +359,7 @@ class ChatMessage(db.Model):
     is_mod = db.Column(db.Boolean, default=False)
 
 class CupChatMessage(db.Model):
+    __table_args__ = (db.Index('ix_cup_chat_message_cursor', 'cup_match_id', 'id'),)
     id = db.Column(db.Integer, primary_key=True)
     cup_match_id = db.Column(db.Integer, db.ForeignKey('cup_match.id'), nullable=False)
     username = db.Column(db.String(100), nullable=False)
@@ -302,6 +369,7 @@ class CupChatMessage(db.Model):
     is_mod = db.Column(db.Boolean, default=False)
 
 class LeagueChatMessage(db.Model):
+    __table_args__ = (db.Index('ix_league_chat_message_cursor', 'league_match_id', 'id'),)
     id = db.Column(db.Integer, primary_key=True)
     league_match_id = db.Column(db.Integer, db.ForeignKey('league_match.id'), nullable=False)
     username = db.Column(db.String(100), nullable=False)
@@ -312,6 +380,8 @@ class LeagueChatMessage(db.Model):
 
 # --- TICKET SYSTEM ---
 class Ticket(db.Model):
+    # "Meine Tickets": author_id + Sortierung nach updated_at
+    __table_args__ = (db.Index('ix_ticket_author_updated', 'author_id', 'updated_at'),)
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
@@ -319,7 +389,7 @@ class Ticket(db.Model):
     category = db.Column(db.String(50), default='general') # general, conflict, bug, report, other
     
     created_at = db.Column(db.DateTime, default=get_current_time)
-    updated_at = db.Column(db.DateTime, default=get_current_time, onupdate=get_current_time)
+    updated_at = db.Column(db.DateTime, default=get_current_time, onupdate=get_current_time, index=True)
     
     author_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     league_match_id = db.Column(db.Integer, db.ForeignKey('league_match.id'), nullable=True) # Optional link to match
@@ -337,4 +407,42 @@ class TicketMessage(db.Model):
     created_at = db.Column(db.DateTime, default=get_current_time)
     
     # Relationships
-    author = db.relationship('User', backref='ticket_messages', lazy=True)
\ No newline at end of file
+    author = db.relationship('User', backref='ticket_messages', lazy=True)
+
+# --- TEAM-FK SYNCHRONISATION ---
+MATCH_MODELS = (Match, CupMatch, LeagueMatch)
+
+def assign_team_ids(session, matches):
+    """
+    Setzt team_a_id/team_b_id passend zu den Team-Namen.
+    Alle benötigten Namen werden mit einem einzigen Query aufgelöst.
+    """
+    names = {n for m in matches for n in (m.team_a, m.team_b) if n}
+    if not names:
+        return
+    with session.no_autoflush:
+        ids = dict(session.execute(select(User.username, User.id).where(User.username.in_(names))).all())
+    for m in matches:
+        m.team_a_id = ids.get(m.team_a)
+        m.team_b_id = ids.get(m.team_b)
+
+def _team_names_changed(obj):
+    attrs = inspect(obj).attrs
+    return attrs.team_a.history.has_changes() or attrs.team_b.history.has_changes()
+
+@event.listens_for(Session, 'before_flush')
+def _sync_team_ids(session, flush_context, instances):
+    # Nur Matches, deren Team-Namen neu gesetzt oder geändert wurden
+    changed = [obj for obj in list(session.new) + list(session.dirty)
+               if isinstance(obj, MATCH_MODELS) and (obj in session.new or _team_names_changed(obj))]
+    if changed:
+        assign_team_ids(session, changed)
+
+@event.listens_for(Session, 'before_flush')
+def _bump_state_version(session, flush_context, instances):
+    # Jede Änderung an einem bestehenden Match (inkl. Veto-Liste) erhöht die Version.
+    # state_version ist zugleich version_id_col: das UPDATE prüft "WHERE state_version = <gelesen>"
+    # und wirft StaleDataError, wenn ein paralleler Request das Match inzwischen geändert hat.
+    for obj in list(session.dirty):
+        if isinstance(obj, MATCH_MODELS) and session.is_modified(obj):
+            obj.state_version = (obj.state_version or 0) + 1
@@ -0,0 +1,90 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from flask import flash, redirect, request, url_for
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashingBusy(Exception):
+    """Die Warteschlange des Hash-Pools ist voll (Login-Ansturm)."""
+
+
+class PasswordHasher:
+    """
+    Führt PBKDF2-Hashing in einem begrenzten Pool aus, damit CPU-lastige Logins
+    die Request-Worker (Live-Polling der Lobbys) nicht blockieren. Mehr als `queue_limit`
+    gleichzeitige Aufträge werden sofort mit HashingBusy abgewiesen statt sich zu stauen.
+    Threads statt Prozesse: hashlib.pbkdf2_hmac gibt den GIL frei, die Hashes laufen also
+    echt parallel – ohne dass jeder Pool-Prozess die komplette App neu importiert.
+    workers=0 hasht direkt im Request (Entwicklung).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pool = None
+        self._slots = None
+        self.workers = 0
+        self.method = 'pbkdf2:sha256'
+        self.timeout = None
+
+    def configure(self, workers, queue_limit, method, timeout):
+        self.shutdown()
+        self.workers = workers
+        self.method = method
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max(1, queue_limit))
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='pwhash')
+            return self._pool
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            return self._executor().submit(fn, *args).result(timeout=self.timeout)
+        except FutureTimeout:
+            raise HashingBusy()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+hasher = PasswordHasher()
+
+
+def hash_password(password):
+    return hasher.hash(password)
+
+
+def verify_password(pwhash, password):
+    return hasher.verify(pwhash, password)
+
+
+def init_password_hashing(app):
+    config = app.config
+    method = 'pbkdf2:sha256'
+    if config.get('PASSWORD_HASH_ITERATIONS'):
+        method += f":{config['PASSWORD_HASH_ITERATIONS']}"
+    hasher.configure(config['PASSWORD_HASH_WORKERS'], config['PASSWORD_HASH_QUEUE_LIMIT'],
+                     method, config['PASSWORD_HASH_TIMEOUT'])
+
+    @app.errorhandler(HashingBusy)
+    def hashing_busy(e):
+        flash('Server gerade ausgelastet – bitte in ein paar Sekunden erneut versuchen.', 'error')
+        return redirect(request.referrer or url_for('auth.login'))
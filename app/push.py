@@ -0,0 +1,175 @@
+import queue
+import threading
+from collections import namedtuple
+
+from sqlalchemy import select
+
+from .extensions import db
+from .firebase_utils import SENT, INVALID, RETRY
+
+PushJob = namedtuple('PushJob', 'tokens title body data attempt')
+
+
+class FirebaseTransport:
+    """Versand über FCM (send_each_for_multicast)."""
+
+    def send(self, tokens, title, body, data=None):
+        from .firebase_utils import send_multicast
+        return send_multicast(tokens, title, body, data)
+
+
+class FakeTransport:
+    """
+    Lokaler Transport ohne Netzwerk (Entwicklung/Offline-Tests): merkt sich alle Batches.
+    invalid_tokens werden als ungültig gemeldet, transient_failures Aufrufe schlagen
+    vorübergehend fehl.
+    """
+
+    def __init__(self, invalid_tokens=(), transient_failures=0):
+        self.batches = []
+        self.invalid_tokens = set(invalid_tokens)
+        self.transient_failures = transient_failures
+
+    def send(self, tokens, title, body, data=None):
+        if self.transient_failures > 0:
+            self.transient_failures -= 1
+            return [RETRY] * len(tokens)
+        self.batches.append((list(tokens), title, body, data))
+        return [INVALID if t in self.invalid_tokens else SENT for t in tokens]
+
+
+TRANSPORTS = {'firebase': FirebaseTransport, 'fake': FakeTransport}
+
+
+class PushDispatcher:
+    """
+    Hintergrund-Versand von Push-Nachrichten: Requests legen nur einen Auftrag in die
+    Queue und kehren sofort zurück. Ein Worker-Thread fasst wartende Aufträge mit gleichem
+    Inhalt zusammen, schickt sie als Multicast (max. batch_size Tokens pro Aufruf),
+    wiederholt vorübergehende Fehler mit Backoff und löscht ungültige Tokens aus der DB.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pending = 0
+        self._idle = threading.Condition(self._lock)
+        self.app = None
+        self.transport = None
+        self.batch_size = 500
+        self.max_retries = 3
+        self.retry_delay = 2.0
+
+    def configure(self, app, transport, batch_size, max_retries, retry_delay):
+        self.app = app
+        self.transport = transport
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+    def notify(self, tokens, title, body, data=None):
+        """Reiht eine Nachricht an alle `tokens` ein. Gibt die Anzahl der Empfänger zurück."""
+        tokens = tuple(dict.fromkeys(t for t in tokens if t))
+        if not tokens:
+            return 0
+        self._put(PushJob(tokens, title, body, data, 0))
+        self._ensure_worker()
+        return len(tokens)
+
+    def wait_idle(self, timeout=None):
+        """Blockiert, bis alle Aufträge (inkl. geplanter Wiederholungen) erledigt sind."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+    def _put(self, job):
+        with self._lock:
+            self._pending += 1
+        self._queue.put(job)
+
+    def _done(self, count=1):
+        with self._idle:
+            self._pending -= count
+            if self._pending == 0:
+                self._idle.notify_all()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='push-dispatcher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            jobs = [self._queue.get()]
+            while True:
+                try: jobs.append(self._queue.get_nowait())
+                except queue.Empty: break
+
+            # Gleiche Nachricht (Titel, Text, Daten, Versuch) -> ein gemeinsamer Multicast
+            merged = {}
+            for job in jobs:
+                key = (job.title, job.body, tuple(sorted((job.data or {}).items())), job.attempt)
+                merged.setdefault(key, (job.data, {}))[1].update(dict.fromkeys(job.tokens))
+            for (title, body, _, attempt), (data, tokens) in merged.items():
+                try:
+                    self._deliver(list(tokens), title, body, data, attempt)
+                except Exception as e:
+                    print(f"❌ Push-Versand fehlgeschlagen: {e}")
+            self._done(len(jobs))
+
+    def _deliver(self, tokens, title, body, data, attempt):
+        invalid, retry = [], []
+        for i in range(0, len(tokens), self.batch_size):
+            batch = tokens[i:i + self.batch_size]
+            for token, status in zip(batch, self.transport.send(batch, title, body, data)):
+                if status == INVALID: invalid.append(token)
+                elif status == RETRY: retry.append(token)
+
+        if invalid:
+            self._prune(invalid)
+        if retry and attempt < self.max_retries:
+            job = PushJob(tuple(retry), title, body, data, attempt + 1)
+            with self._lock:
+                self._pending += 1
+            timer = threading.Timer(self.retry_delay * (2 ** attempt), self._queue.put, args=(job,))
+            timer.daemon = True
+            timer.start()
+        elif retry:
+            print(f"⚠️ Push an {len(retry)} Geräte nach {attempt + 1} Versuchen aufgegeben.")
+
+    def _prune(self, tokens):
+        """Ungültige FCM-Tokens entfernen (über die Session, damit der User-Cache invalidiert wird)."""
+        from .models import User
+        with self.app.app_context():
+            users = User.query.filter(User.fcm_token.in_(tokens)).all()
+            for user in users:
+                user.fcm_token = None
+            db.session.commit()
+        print(f"🧹 {len(users)} ungültige Push-Tokens entfernt.")
+
+
+dispatcher = PushDispatcher()
+
+
+def init_push(app):
+    config = app.config
+    dispatcher.configure(app, TRANSPORTS[config['PUSH_TRANSPORT']](), config['PUSH_BATCH_SIZE'],
+                         config['PUSH_MAX_RETRIES'], config['PUSH_RETRY_DELAY'])
+
+
+def notify_tokens(tokens, title, body, url=None):
+    return dispatcher.notify(tokens, title, body, {'url': url} if url else None)
+
+
+def notify_users(users, title, body, url=None):
+    return notify_tokens([u.fcm_token for u in users], title, body, url)
+
+
+def notify_staff(title, body, url=None):
+    """Alle Admins und Mods – lädt nur die Tokens, keine User-Objekte."""
+    from .models import User
+    tokens = db.session.execute(
+        select(User.fcm_token).where((User.is_admin == True) | (User.is_mod == True), User.fcm_token.isnot(None))
+    ).scalars().all()
+    return notify_tokens(tokens, title, body, url)
@@ -0,0 +1,39 @@
+import hashlib
+import os
+import threading
+
+# Statische Dateien, die der Service Worker bei der Installation vorab lädt
+# (Pfade relativ zu app/static). Map-Bilder und Logos cacht er erst bei Bedarf.
+PRECACHE = [
+    'style.css',
+    'logo.png',
+    'favicon.ico',
+    'manifest.json',
+    'img/background.png',
+    'icons/icon-192.png',
+    'icons/icon-512.png',
+]
+
+_lock = threading.Lock()
+_manifest = None
+
+
+def _file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def precache_manifest(static_folder, reload=False):
+    """
+    (Version, [(URL, Hash)]) der vorab gecachten Dateien. Die Version ändert sich mit jedem
+    Datei-Inhalt – damit ändert sich sw.js, der Browser installiert den neuen Worker und
+    räumt die alten Caches ab. Wird einmal pro Prozess berechnet (reload=True im Debug-Modus).
+    """
+    global _manifest
+    with _lock:
+        if _manifest is None or reload:
+            assets = [(f"/static/{name}", _file_hash(os.path.join(static_folder, name)))
+                      for name in PRECACHE if os.path.exists(os.path.join(static_folder, name))]
+            version = hashlib.sha256(repr(assets).encode()).hexdigest()[:12]
+            _manifest = (version, assets)
+        return _manifest
@@ -1,12 +1,11 @@
 import os
-import random
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
-from werkzeug.security import generate_password_hash
-from werkzeug.utils import secure_filename
-from app.models import User, Clan, Map
+from app.passwords import hash_password
+from app.models import User, Clan, Map, MapVeto
 from app.extensions import db
 from app.utils import allowed_file
+from app.images import store_image, InvalidImage
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -23,24 +22,24 @@ def users_manager():
 @login_required
 def maps_manager():
     if not current_user.is_admin: return redirect(url_for('main.dashboard'))
-    return render_template('admin/maps.html', active_maps=[m for m in Map.query.all() if not m.is_archived], archived_maps=[m for m in Map.query.all() if m.is_archived])
+    return render_template('admin/maps.html', active_maps=[m for m in Map.query.all() if not m.is_archived], archived_maps=[m for m in Map.query.all() if m.is_archived], veto_stats=MapVeto.stats())
 
 @admin_bp.route('/create_admin', methods=['POST'])
 @login_required
 def create_admin():
-    if current_user.is_admin: db.session.add(User(username=request.form.get('username'), password=generate_password_hash(request.form.get('password'), method='pbkdf2:sha256'), is_admin=True)); db.session.commit()
+    if current_user.is_admin: db.session.add(User(username=request.form.get('username'), password=hash_password(request.form.get('password')), is_admin=True)); db.session.commit()
     return redirect(url_for('main.users'))
 
 @admin_bp.route('/create_mod', methods=['POST'])
 @login_required
 def create_mod():
-    if current_user.is_admin: db.session.add(User(username=request.form.get('username'), password=generate_password_hash(request.form.get('password'), method='pbkdf2:sha256'), is_mod=True)); db.session.commit()
+    if current_user.is_admin: db.session.add(User(username=request.form.get('username'), password=hash_password(request.form.get('password')), is_mod=True)); db.session.commit()
     return redirect(url_for('main.users'))
 
 @admin_bp.route('/create_clan', methods=['POST'])
 @login_required
 def create_clan():
-    if current_user.is_admin: db.session.add(Clan(name=request.form.get('clan_name'), password=generate_password_hash("1234", method='pbkdf2:sha256'))); db.session.commit()
+    if current_user.is_admin: db.session.add(Clan(name=request.form.get('clan_name'), password=hash_password("1234"))); db.session.commit()
     return redirect(url_for('main.users'))
 
 @admin_bp.route('/create_user', methods=['POST'])
@@ -57,14 +56,26 @@ def create_user():
             final_name = raw_name
 
         if not User.query.filter_by(username=final_name).first():
-            db.session.add(User(username=final_name, token=str(random.randint(10000,99999)), clan_id=c_id))
+            new_team = User(username=final_name, clan_id=c_id)
+            token = new_team.issue_token()
+            db.session.add(new_team)
             db.session.commit()
-            flash(f'Team {final_name} erstellt!', 'success')
+            flash(f'Team {final_name} erstellt! Token: {token}', 'success')
         else:
             flash('Name bereits vergeben.', 'error')
 
     return redirect(url_for('main.users'))
 
+@admin_bp.route('/reset_user_token/<int:user_id>', methods=['POST'])
+@login_required
+def reset_user_token(user_id):
+    if current_user.is_admin:
+        team = User.query.get_or_404(user_id)
+        token = team.issue_token()
+        db.session.commit()
+        flash(f'Neues Token für {team.display_name}: {token}', 'success')
+    return redirect(url_for('main.users'))
+
 @admin_bp.route('/delete_user/<int:user_id>', methods=['POST'])
 @login_required
 def delete_user(user_id):
@@ -81,13 +92,13 @@ def delete_clan(clan_id):
 @login_required
 def admin_change_password():
     if current_user.is_admin and request.form.get('new_password') == request.form.get('confirm_password'):
-        current_user.password = generate_password_hash(request.form.get('new_password'), method='pbkdf2:sha256'); db.session.commit(); flash('PW geändert.', 'success')
+        current_user.password = hash_password(request.form.get('new_password')); db.session.commit(); flash('PW geändert.', 'success')
     return redirect(url_for('main.users'))
 
 @admin_bp.route('/admin_reset_clan_password/<int:clan_id>', methods=['POST'])
 @login_required
 def admin_reset_clan_password(clan_id):
-    if current_user.is_admin: Clan.query.get_or_404(clan_id).password = generate_password_hash(request.form.get('new_password'), method='pbkdf2:sha256'); db.session.commit()
+    if current_user.is_admin: Clan.query.get_or_404(clan_id).password = hash_password(request.form.get('new_password')); db.session.commit()
     return redirect(url_for('main.users'))
 
 @admin_bp.route('/add_map', methods=['POST'])
@@ -96,8 +107,8 @@ def add_map():
     if current_user.is_admin:
         for f in request.files.getlist('map_images'):
             if f and allowed_file(f.filename):
-                s = secure_filename(f.filename)
-                f.save(os.path.join(current_app.config['UPLOAD_FOLDER'], s))
+                try: s = store_image(f, 'map_images')
+                except InvalidImage: flash(f'{f.filename}: kein gültiges Bild.', 'error'); continue
                 db.session.add(Map(name=os.path.splitext(f.filename)[0].replace('_',' ').title(), image_file=s))
         db.session.commit()
     return redirect(url_for('admin.maps_manager'))
@@ -1,8 +1,12 @@
-from flask import Blueprint, request, jsonify
+import json
+import time
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app, abort
+from sqlalchemy import select
 from flask_login import login_required, current_user
-from app.models import Match, CupMatch, LeagueMatch, ChatMessage, CupChatMessage, LeagueChatMessage
+from app.models import User, Match, CupMatch, LeagueMatch, ChatMessage, CupChatMessage, LeagueChatMessage
 from app.extensions import db
-from app.firebase_utils import send_push_notification
+from app.push import notify_users
+from app.live import bus, streams
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
@@ -26,8 +30,8 @@ def test_push():
     user = User.query.filter_by(username=target_username).first() if target_username else current_user
     
     if user and user.fcm_token:
-        success = send_push_notification(user.fcm_token, "Test Notification", "This is a test from Tournament 2.0")
-        return jsonify({'status': 'ok', 'sent': success})
+        queued = notify_users([user], "Test Notification", "This is a test from Tournament 2.0")
+        return jsonify({'status': 'ok', 'queued': queued})
     return jsonify({'status': 'error', 'msg': 'User has no token'}), 404
 
 def handle_chat(model, match_id, id_field):
@@ -36,8 +40,14 @@ def handle_chat(model, match_id, id_field):
         setattr(msg, id_field, match_id)
         db.session.add(msg); db.session.commit()
         return jsonify({'status':'ok'})
-    msgs = model.query.filter_by(**{id_field: match_id}).order_by(model.timestamp).all()
-    return jsonify([{'user':m.username, 'text':m.message, 'time':m.timestamp.strftime('%H:%M'), 'is_admin':m.is_admin, 'is_mod':m.is_mod, 'is_me':m.username==current_user.username} for m in msgs])
+    # Cursor: mit ?after_id=<id> nur neue Nachrichten liefern (Polling)
+    return jsonify(chat_payload(model, match_id, id_field, request.args.get('after_id', type=int)))
+
+def chat_payload(model, match_id, id_field, after_id=None):
+    query = model.query.filter_by(**{id_field: match_id})
+    if after_id: query = query.filter(model.id > after_id)
+    msgs = query.order_by(model.id).all()
+    return [{'id':m.id, 'user':m.username, 'text':m.message, 'time':m.timestamp.strftime('%H:%M'), 'is_admin':m.is_admin, 'is_mod':m.is_mod, 'is_me':m.username==current_user.username} for m in msgs]
 
 @api_bp.route('/match/<int:match_id>/chat', methods=['GET', 'POST'])
 @login_required
@@ -65,25 +75,17 @@ def match_lobby(match_id):
 def league_lobby(match_id):
     return jsonify({'lobby_code': LeagueMatch.query.get_or_404(match_id).lobby_code or ''})
 
-@api_bp.route('/match/<int:match_id>/state')
-@login_required
-def match_state(match_id):
-    m = Match.query.get_or_404(match_id)
+# --- STATE PAYLOADS (Polling + Live-Stream) ---
+def match_state_payload(m):
     active = m.team_a if m.state.endswith('_a') else (m.team_b if m.state.endswith('_b') else None)
-    return jsonify({'state':m.state, 'active_team':active, 'banned':m.get_banned(), 'picked':m.get_picked(), 'lobby_code':m.lobby_code})
+    return {'state':m.state, 'active_team':active, 'banned':m.get_banned(), 'picked':m.get_picked(), 'lobby_code':m.lobby_code, 'scores_a':m.get_scores_a(), 'scores_b':m.get_scores_b()}
 
-@api_bp.route('/cup_match/<int:match_id>/state')
-@login_required
-def cup_state(match_id):
-    m = CupMatch.query.get_or_404(match_id)
-    return jsonify({'state':m.state, 'current_picker':m.current_picker, 'picked':m.get_picked(), 'lobby_code':m.lobby_code, 'ready_a':m.ready_a, 'ready_b':m.ready_b})
+def cup_state_payload(m):
+    return {'state':m.state, 'current_picker':m.current_picker, 'picked':m.get_picked(), 'lobby_code':m.lobby_code, 'confirmed_a':m.confirmed_a, 'confirmed_b':m.confirmed_b, 'scores_a':m.get_scores_a(), 'scores_b':m.get_scores_b()}
 
-@api_bp.route('/league_match/<int:match_id>/state')
-@login_required
-def league_state(match_id):
-    m = LeagueMatch.query.get_or_404(match_id)
+def league_state_payload(m):
     active = m.team_a if m.state.endswith('_a') else (m.team_b if m.state.endswith('_b') else None)
-    return jsonify({
+    return {
         'state':m.state, 
         'active_team':active, 
         'banned':m.get_banned(), 
@@ -91,6 +93,119 @@ def league_state(match_id):
         'lobby_code':m.lobby_code, 
         'confirmed_a':m.confirmed_a, 
         'confirmed_b':m.confirmed_b,
+        'ready_a':m.ready_a,
+        'ready_b':m.ready_b,
         'has_draft_a': bool(m.draft_a_scores),
-        'has_draft_b': bool(m.draft_b_scores)
-    })
\ No newline at end of file
+        'has_draft_b': bool(m.draft_b_scores),
+        'scores_a': m.get_scores_a(),
+        'scores_b': m.get_scores_b()
+    }
+
+def get_state_version(model, match_id):
+    """Liest nur die Versionsspalte (PK-Lookup), ohne das Match zu laden."""
+    return db.session.scalar(select(model.state_version).where(model.id == match_id))
+
+def versioned_state(model, payload, match_id):
+    """
+    Antwortet mit ETag = Match-Version. Kennt der Client die aktuelle Version
+    (If-None-Match), gibt es ein 304 ohne das Match zu laden oder zu serialisieren.
+    """
+    version = get_state_version(model, match_id)
+    if version is None: abort(404)
+    etag = f"{model.__tablename__}-{match_id}-v{version}"
+    if request.if_none_match.contains(etag):
+        res = Response(status=304)
+    else:
+        res = jsonify(payload(db.session.get(model, match_id)))
+    res.set_etag(etag)
+    # Browser muss immer revalidieren, darf aber die gecachte Antwort für 304 nutzen
+    res.headers['Cache-Control'] = 'no-cache'
+    return res
+
+@api_bp.route('/match/<int:match_id>/state')
+@login_required
+def match_state(match_id):
+    return versioned_state(Match, match_state_payload, match_id)
+
+@api_bp.route('/cup_match/<int:match_id>/state')
+@login_required
+def cup_state(match_id):
+    return versioned_state(CupMatch, cup_state_payload, match_id)
+
+@api_bp.route('/league_match/<int:match_id>/state')
+@login_required
+def league_state(match_id):
+    return versioned_state(LeagueMatch, league_state_payload, match_id)
+
+# --- LIVE STREAM (Server-Sent Events) ---
+def sse_event(name, data, event_id=None):
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {name}\ndata: {json.dumps(data)}\n\n"
+
+def stream_match(kind, model, payload, chat_model, id_field, match_id):
+    """
+    Sendet Status und neue Chat-Nachrichten nur bei Änderungen.
+    Aufgeweckt wird der Stream vom Live-Bus (Commit im selben Prozess) oder spätestens
+    nach SSE_POLL_SECONDS, dann wird der Stand erneut geprüft (Commits anderer Worker).
+    Ohne Event kommt alle SSE_KEEPALIVE_SECONDS ein Kommentar, damit Proxys nicht trennen.
+    Nach SSE_STREAM_LIFETIME (Wanduhr) endet der Stream; der Browser verbindet sich neu.
+    Sind alle SSE_MAX_STREAMS belegt, gibt es 503 und die Lobby pollt.
+    """
+    model.query.get_or_404(match_id)
+    if not streams.acquire():
+        # EventSource verbindet nach einem Nicht-200 nicht neu -> onerror startet das Polling
+        return Response(status=503, headers={'Retry-After': '30', 'Cache-Control': 'no-cache'})
+    key = (kind, match_id)
+    # Beim Reconnect sendet der Browser die zuletzt empfangene Chat-ID als Last-Event-ID
+    after_id = request.headers.get('Last-Event-ID', type=int) or request.args.get('after_id', 0, type=int)
+    poll = current_app.config['SSE_POLL_SECONDS']
+    keepalive = current_app.config['SSE_KEEPALIVE_SECONDS']
+    lifetime = current_app.config['SSE_STREAM_LIFETIME']
+
+    def generate():
+        nonlocal after_id
+        last_version = None
+        seen = bus.current(key)
+        # Wanduhr statt Leerlaufzeit: auch ein Stream in einer aktiven Lobby gibt den Thread wieder frei
+        started = last_sent = time.monotonic()
+        yield f"retry: 3000\n\n"
+        while time.monotonic() - started < lifetime:
+            version = get_state_version(model, match_id)
+            if version is None:
+                yield sse_event('gone', {})
+                return
+            # Match nur bei neuer Version laden und senden
+            if version != last_version:
+                yield sse_event('state', payload(db.session.get(model, match_id)))
+                last_version = version
+                last_sent = time.monotonic()
+            msgs = chat_payload(chat_model, match_id, id_field, after_id)
+            if msgs:
+                after_id = msgs[-1]['id']
+                yield sse_event('chat', msgs, event_id=after_id)
+                last_sent = time.monotonic()
+            # Verbindung/Transaktion freigeben, damit der nächste Durchlauf frische Daten sieht
+            db.session.close()
+
+            seen = bus.wait(key, seen, timeout=poll)
+            if time.monotonic() - last_sent >= keepalive:
+                yield ": keep-alive\n\n"
+                last_sent = time.monotonic()
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Platz freigeben, sobald der Server die Antwort schließt (Ende, Abbruch durch den Browser)
+    response.call_on_close(streams.release)
+    return response
+
+@api_bp.route('/match/<int:match_id>/stream')
+@login_required
+def match_stream(match_id): return stream_match('match', Match, match_state_payload, ChatMessage, 'match_id', match_id)
+
+@api_bp.route('/cup_match/<int:match_id>/stream')
+@login_required
+def cup_stream(match_id): return stream_match('cup_match', CupMatch, cup_state_payload, CupChatMessage, 'cup_match_id', match_id)
+
+@api_bp.route('/league_match/<int:match_id>/stream')
+@login_required
+def league_stream(match_id): return stream_match('league_match', LeagueMatch, league_state_payload, LeagueChatMessage, 'league_match_id', match_id)
\ No newline at end of file
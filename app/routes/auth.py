@@ -1,10 +1,12 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_user, logout_user, login_required
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.passwords import hash_password, verify_password
 from app.models import User, Clan
 from app.extensions import db
+from app.utils import hash_token
 from sqlalchemy import func
 import re # Für die Regex-Validierung nötig
+import hmac
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -14,23 +16,30 @@ def login():
         username = request.form.get('username')
         password = request.form.get('password')
 
-        # 1. Token Login
-        token_user = User.query.filter_by(token=password).first()
-        if token_user:
-            login_user(token_user)
-            flash('Login mit Token erfolgreich.', 'success')
-            return redirect(url_for('main.dashboard'))
-
-        # 2. Passwort Login (Für normale User UND Clan-Admins)
+        # 1. Passwort Login (Für normale User UND Clan-Admins)
         # Da der Clan-Name jetzt der Username des Admins ist, funktioniert das hier universell.
         user = User.query.filter_by(username=username).first()
-        
-        if user and user.password and check_password_hash(user.password, password):
+
+        if user and user.password and verify_password(user.password, password):
             login_user(user)
             flash('Willkommen zurück.', 'success')
             if getattr(user, 'is_clan_admin', False):
                 return redirect(url_for('main.clan_dashboard'))
             return redirect(url_for('main.dashboard'))
+
+        # 2. Token Login über den Hash: passt der Token zum gefundenen User, ohne weiteren Query;
+        # der Index-Lookup läuft nur, wenn der Name kein Passwort-Account ist
+        token_user = None
+        if password:
+            token_hash = hash_token(password)
+            if user and user.token_hash and hmac.compare_digest(user.token_hash, token_hash):
+                token_user = user
+            elif not (user and user.password):
+                token_user = User.query.filter_by(token_hash=token_hash).first()
+        if token_user:
+            login_user(token_user)
+            flash('Login mit Token erfolgreich.', 'success')
+            return redirect(url_for('main.dashboard'))
         
         flash('Login fehlgeschlagen. Bitte Daten prüfen.', 'error')
     return render_template('auth/login.html')
@@ -81,7 +90,7 @@ def register_clan():
         db.session.commit() # ID generieren
 
         # 7. Admin-User erstellen (MIT PASSWORT)
-        hashed_password = generate_password_hash(password, method='pbkdf2:sha256')
+        hashed_password = hash_password(password)
         
         admin_user = User(
             username=clan_name,          # Der Admin-Account heißt wie der Clan
@@ -5,6 +5,8 @@ from app.extensions import db
 import json
 from datetime import datetime
 from app.utils import get_current_time
+from app.team_resolver import get_team_resolver
+from app.scheduling import round_robin, bulk_insert_fixtures
 
 cup_bp = Blueprint('cup', __name__)
 
@@ -48,33 +50,10 @@ def setup_cup_rosters(cup_id):
         
         cup.rosters = json.dumps(cup_rosters)
         
-        # Matches generieren (Round Robin)
-        teams_list = team_names.copy()
-        if len(teams_list) % 2 != 0: teams_list.append(None)
-        
-        for r in range(len(teams_list)-1):
-            for i in range(len(teams_list)//2):
-                t1 = teams_list[i]
-                t2 = teams_list[len(teams_list)-1-i]
-                
-                if t1 and t2:
-                    # Lineups aus dem soeben gespeicherten Roster holen
-                    lineup_a = cup_rosters.get(t1, [])
-                    lineup_b = cup_rosters.get(t2, [])
-                    
-                    match = CupMatch(
-                        cup_id=cup.id,
-                        team_a=t1,
-                        team_b=t2,
-                        round_number=r+1,
-                        lineup_a=json.dumps(lineup_a),
-                        lineup_b=json.dumps(lineup_b),
-                        confirmed_a=False,
-                        confirmed_b=False
-                    )
-                    db.session.add(match)
-            
-            teams_list.insert(1, teams_list.pop()) # Rotation
+        # Matches generieren (Round Robin). Die Lineups werden nicht pro Match kopiert,
+        # CupMatch liest sie aus cup.rosters.
+        bulk_insert_fixtures(CupMatch, round_robin(team_names), {t.username: t.id for t in teams_obj},
+                             cup_id=cup.id, confirmed_a=False, confirmed_b=False)
 
         db.session.commit()
         flash(f"Cup '{cup.name}' erfolgreich gestartet!", "success")
@@ -98,13 +77,13 @@ def cup_match_view(match_id):
     player_ids = {}
     
     # IDs von Team A laden
-    user_a = User.query.filter_by(username=match.team_a).first()
+    user_a = match.team_a_user
     if user_a:
         for m in user_a.team_members:
             player_ids[m.gamertag] = m.activision_id
             
     # IDs von Team B laden
-    user_b = User.query.filter_by(username=match.team_b).first()
+    user_b = match.team_b_user
     if user_b:
         for m in user_b.team_members:
             player_ids[m.gamertag] = m.activision_id
@@ -121,7 +100,7 @@ def cup_match_view(match_id):
         # Maps setzen
         elif 'set_maps' in request.form and (current_user.is_admin or current_user.is_mod):
             selected = [request.form.get(f'map_{i}') for i in range(1, 4)]
-            match.picked_maps = json.dumps(selected)
+            match.set_picks(selected)
             if match.state == 'waiting_for_ready':
                 match.state = 'waiting_for_code'
             db.session.commit()
@@ -148,6 +127,7 @@ def cup_match_view(match_id):
 
         return redirect(url_for('cup.cup_match_view', match_id=match.id))
 
+    get_team_resolver().prime_matches([match])
     return render_template('cup/match.html', 
                            match=match, 
                            all_maps=Map.query.filter_by(is_archived=False).all(), 
@@ -189,7 +169,7 @@ def cup_details(cup_id):
     else:
         # Für normale User: Nur Matches anzeigen, deren Vorgänger (chronologisch/Runde) beendet ist
         user_matches = sorted(
-            [m for m in cup_matches if m.team_a == current_user.username or m.team_b == current_user.username],
+            [m for m in cup_matches if m.is_participant(current_user)],
             key=lambda x: x.round_number
         )
         
@@ -204,10 +184,13 @@ def cup_details(cup_id):
                 else:
                     break
 
+    teams = get_team_resolver().prime_matches(cup_matches)
+
     return render_template('cup/details.html', 
                            cup=cup, 
                            standings=sorted(standings.items(), key=lambda x: (x[1]['won_matches'], x[1]['own_score']), reverse=True),
-                           visible_match_ids=visible_match_ids)
+                           visible_match_ids=visible_match_ids,
+                           teams=teams)
 
 # --- 5. VERWALTUNG (ARCHIVIEREN / LÖSCHEN) ---
 @cup_bp.route('/archive_cup/<int:cup_id>', methods=['POST'])
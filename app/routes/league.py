@@ -1,11 +1,16 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
 from app.models import League, LeagueMatch, User, Map, Ticket
 from app.extensions import db
-from app.firebase_utils import send_push_notification
+from app.database import wants_json
+from app.routes.api import league_state_payload
+from app.push import notify_staff
 import json
 from datetime import datetime
 from app.utils import get_current_time
+from app.team_resolver import get_team_resolver
+from app.standings import get_league_table, rebuild_league_standings
+from app.scheduling import round_robin, schedule_summary, team_id_map, bulk_insert_fixtures
 from config import Config
 try:
     import zoneinfo
@@ -17,7 +22,12 @@ league_bp = Blueprint('league', __name__)
 def handle_pick_ban_logic(match, selected_map):
     current_banned = match.get_banned()
     current_picked = match.get_picked()
+    veto_state = match.state
     
+    # Veto schon vorbei (z.B. Klick, der nach dem letzten Pick ankommt)
+    if not veto_state.startswith(('ban_', 'pick_')):
+        return False, "Map-Veto ist bereits abgeschlossen."
+
     # Prüfen, ob Karte schon vergeben ist
     if selected_map in current_banned or selected_map in current_picked: 
         return False, "Karte bereits vergeben."
@@ -52,8 +62,9 @@ def handle_pick_ban_logic(match, selected_map):
         # 2 von A + 2 von B = 4 -> Scoring
         if len(current_picked) >= 4: match.state = 'scoring_phase'
     
-    match.banned_maps = json.dumps(current_banned)
-    match.picked_maps = json.dumps(current_picked)
+    # Nur die neue Aktion anhängen (MapVeto-Zeile statt JSON neu schreiben)
+    if veto_state.startswith('ban_'): match.add_veto('ban', selected_map, team=veto_state[-1])
+    elif veto_state.startswith('pick_'): match.add_veto('pick', selected_map, team=veto_state[-1])
     return True, "Erfolgreich."
 
 def handle_scoring_logic(match, form_data, user):
@@ -122,61 +133,35 @@ def create_league():
         except: start_date = get_current_time().date()
 
         participants_list = request.form.getlist('selected_users')
+        double = bool(request.form.get('double_round_robin'))
         l = League(name=request.form.get('league_name'), participants=json.dumps(participants_list), start_date=start_date)
-        db.session.add(l); db.session.commit()
+        db.session.add(l); db.session.flush()
+        rebuild_league_standings(l)  # leere Tabellenzeilen für alle Teilnehmer
 
-        teams = list(participants_list)
-        if len(teams) % 2 != 0: teams.append(None) # Bye week placeholders
-        
-        num_weeks = len(teams) - 1
-        
-        # Round Robin Scheduling
-        for week in range(num_weeks):
-            for i in range(len(teams)//2):
-                t1 = teams[i]
-                t2 = teams[len(teams)-1-i]
-                if t1 and t2:
-                    # Match erstellen für diese Woche
-                    m = LeagueMatch(
-                        league_id=l.id, 
-                        team_a=t1, 
-                        team_b=t2, 
-                        round_number=week+1, 
-                        match_week=week+1
-                    )
-                    # Default-Datum berechnen: Startdatum + (Wochen-Offset) + Freitag (4 Tage)
-                    # Startdatum ist idealerweise ein Montag.
-                    # Bsp: Start 01.01 (Mo) -> Woche 1 Freitag = 05.01.
-                    # Delta days = (week * 7) + 4
-                    # Wir setzen vorerst KEIN scheduled_date, das passiert bei Deadline oder Einigung.
-                    # Aber wir können es als Referenz nutzen, falls wir es brauchen.
-                    db.session.add(m)
-            
-            # Rotate teams (ausgenommen 1. Element)
-            teams.insert(1, teams.pop())
-            
+        # Spielplan als Stream erzeugen und in einem executemany schreiben (scheduled_date
+        # bleibt leer, das passiert bei Deadline oder Einigung)
+        bulk_insert_fixtures(LeagueMatch, round_robin(participants_list, double=double), team_id_map(participants_list),
+                             round_columns=('round_number', 'match_week'), league_id=l.id)
         db.session.commit()
         return redirect(url_for('main.dashboard'))
     return render_template('league/create.html', users=User.query.filter_by(is_admin=False, is_mod=False).all())
 
+@league_bp.route('/league_schedule_preview', methods=['POST'])
+@login_required
+def league_schedule_preview():
+    """Spielplan-Vorschau für das Erstell-Formular, ohne etwas zu speichern."""
+    if not current_user.is_admin: return jsonify({'error': 'forbidden'}), 403
+    teams = request.form.getlist('selected_users')
+    double = bool(request.form.get('double_round_robin'))
+    summary = schedule_summary(teams, double=double)
+    summary['fixtures'] = [list(f) for f in round_robin(teams, double=double)]
+    return jsonify(summary)
+
 @league_bp.route('/league/<int:league_id>')
 def league_details(league_id):
     league = League.query.get_or_404(league_id)
-    standings = {user: {'played': 0, 'won_matches': 0, 'lost_matches': 0, 'draw_matches': 0, 'own_score': 0, 'opp_score': 0} for user in league.get_participants()}
-    for m in league.matches:
-        if m.state == 'finished':
-            wa, wb = m.get_map_wins(); sum_a = sum(m.get_scores_a()); sum_b = sum(m.get_scores_b())
-            if m.team_a in standings:
-                s=standings[m.team_a]; s['played']+=1; s['own_score']+=sum_a; s['opp_score']+=sum_b
-                if wa>wb: s['won_matches']+=1
-                elif wb>wa: s['lost_matches']+=1
-                else: s['draw_matches']+=1
-            if m.team_b in standings:
-                s=standings[m.team_b]; s['played']+=1; s['own_score']+=sum_b; s['opp_score']+=sum_a
-                if wb>wa: s['won_matches']+=1
-                elif wa>wb: s['lost_matches']+=1
-                else: s['draw_matches']+=1
-    return render_template('league/details.html', league=league, standings=sorted(standings.items(), key=lambda x:x[1]['own_score'], reverse=True))
+    teams = get_team_resolver().prime_matches(league.matches)
+    return render_template('league/details.html', league=league, standings=[(row.team, row) for row in get_league_table(league)], teams=teams)
 
 
 from datetime import timedelta
@@ -290,16 +275,21 @@ def league_match_view(match_id):
                     flash(f"Bereit-Melden erst ab 15 Minuten vor Match-Start möglich! (Start: {match.scheduled_date.strftime('%H:%M')})", "warning")
 
         # --- EXISTING LOGIC ---
-        elif 'selected_map' in request.form and (current_user.is_admin or current_user.username == active):
+        elif 'selected_map' in request.form:
+            if not (current_user.is_admin or current_user.username == active):
+                success, msg = False, "Du bist gerade nicht am Zug."
             # CHECK READY STATUS
-            if not (match.ready_a and match.ready_b):
-                 flash("Beide Teams müssen BEREIT sein, um zu starten!", "error")
+            elif not (match.ready_a and match.ready_b):
+                success, msg = False, "Beide Teams müssen BEREIT sein, um zu starten!"
             else:
                 success, msg = handle_pick_ban_logic(match, request.form.get('selected_map'))
-                if success:
-                    db.session.commit()
-                else:
-                    flash(msg, "error")
+            if success:
+                db.session.commit()
+            # Lobby-JS klickt per fetch: Ergebnis + aktueller Stand statt Redirect (409 siehe database.py)
+            if wants_json():
+                return jsonify({'status': 'ok' if success else 'error', 'msg': msg, 'state': league_state_payload(match)})
+            if not success:
+                flash(msg, "error")
                 
         elif 'submit_scores' in request.form:
             success, msg = handle_scoring_logic(match, request.form, current_user)
@@ -337,17 +327,13 @@ def league_match_view(match_id):
                 db.session.add(new_ticket)
                 db.session.commit()
                 
-                # Notify Admins about Conflict
+                # Notify Admins about Conflict (Versand im Hintergrund)
                 try:
-                    admins = User.query.filter((User.is_admin == True) | (User.is_mod == True)).all()
-                    for admin in admins:
-                        if admin.fcm_token:
-                            send_push_notification(
-                                admin.fcm_token,
-                                f"Konflikt gemeldet!",
-                                f"Match #{match.id}: {match.team_a} vs {match.team_b}",
-                                data={'url': url_for('tickets.detail', ticket_id=new_ticket.id, _external=True)}
-                            )
+                    notify_staff(
+                        "Konflikt gemeldet!",
+                        f"Match #{match.id}: {match.team_a} vs {match.team_b}",
+                        url=url_for('tickets.detail', ticket_id=new_ticket.id, _external=True)
+                    )
                 except Exception as e:
                     print(f"Error sending conflict notification: {e}")
 
@@ -363,13 +349,14 @@ def league_match_view(match_id):
         return redirect(url_for('league.league_match_view', match_id=match.id))
     
     # --- WICHTIG: Mitglieder laden für die Bann-Anzeige ---
-    user_a = User.query.filter_by(username=match.team_a).first()
+    user_a = match.team_a_user
     members_a = user_a.team_members if user_a else []
 
-    user_b = User.query.filter_by(username=match.team_b).first()
+    user_b = match.team_b_user
     members_b = user_b.team_members if user_b else []
     # ----------------------------------------------------
 
+    get_team_resolver().prime_matches([match])
     return render_template('league/match.html', 
                            match=match, 
                            all_maps=Map.query.filter_by(is_archived=False).all(), 
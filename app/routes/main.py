@@ -1,30 +1,52 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, send_from_directory, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
 from flask_login import login_required, current_user
-from werkzeug.security import check_password_hash, generate_password_hash
-from app.models import User, TeamMember, Tournament, Cup, League, Clan, Match, Map
+from app.passwords import hash_password, verify_password
+from app.models import User, TeamMember, Clan, Match, Map
 from app.extensions import db
 from sqlalchemy import func
 from datetime import datetime, timedelta
 from app.utils import get_current_time
 import os
 import json
-import secrets
-from werkzeug.utils import secure_filename
+import time
 from app.utils import allowed_file
+from app.images import store_image, InvalidImage
+from app.dashboard import get_dashboard_summary
+from app.pwa import precache_manifest
 
 main_bp = Blueprint('main', __name__)
 
+class SetupState:
+    """
+    Prozessweites Flag "Setup abgeschlossen" (es existiert ein Admin).
+    Solange es False ist, fragt jeder Request die DB – so sehen auch andere Worker-Prozesse
+    ein Setup sofort. Ist es True, wird es nur alle SETUP_RECHECK_SECONDS neu geprüft.
+    """
+    def __init__(self):
+        self.complete = False
+        self.checked_at = 0.0
+
+    def is_complete(self):
+        if self.complete and time.monotonic() - self.checked_at < current_app.config['SETUP_RECHECK_SECONDS']:
+            return True
+        self.complete = db.session.query(User.query.filter_by(is_admin=True).exists()).scalar()
+        self.checked_at = time.monotonic()
+        return self.complete
+
+    def mark_complete(self):
+        self.complete = True
+        self.checked_at = time.monotonic()
+
+setup_state = SetupState()
+
 @main_bp.before_app_request
 def check_first_run():
     # Ausnahmen: Statische Dateien (CSS/JS) und die Setup-Seite selbst nicht blockieren
     if request.endpoint and ('static' in request.endpoint or 'main.setup' in request.endpoint or 'main.do_setup' in request.endpoint):
         return
 
-    # Prüfen, ob IRGENDEIN Admin existiert
-    admin_exists = User.query.filter_by(is_admin=True).first()
-    
     # Wenn KEIN Admin da ist -> Ab zum Setup!
-    if not admin_exists:
+    if not setup_state.is_complete():
         return redirect(url_for('main.setup'))
 
 # --- SETUP ROUTEN ---
@@ -45,11 +67,12 @@ def do_setup():
     password = request.form.get('password')
     
     if username and password:
-        hashed_pw = generate_password_hash(password, method='pbkdf2:sha256')
+        hashed_pw = hash_password(password)
         # Erster User ist Admin UND Mod
         new_admin = User(username=username, password=hashed_pw, is_admin=True)
         db.session.add(new_admin)
         db.session.commit()
+        setup_state.mark_complete()
         flash('Installation erfolgreich! Bitte einloggen.', 'success')
         return redirect(url_for('auth.login')) # Oder main.dashboard wenn auto-login gewünscht
     
@@ -61,21 +84,20 @@ def do_setup():
 @main_bp.route('/dashboard')
 @login_required
 def dashboard():
-    active_tournaments = Tournament.query.filter_by(is_archived=False).all()
-    archived_tournaments = Tournament.query.filter_by(is_archived=True).all()
-    active_cups = Cup.query.filter_by(is_archived=False).all()
-    archived_cups = Cup.query.filter_by(is_archived=True).all()
-    active_leagues = League.query.filter_by(is_archived=False).all()
-    archived_leagues = League.query.filter_by(is_archived=True).all()
+    # Aktive + archivierte Wettbewerbe in einem Query, gecacht pro Rolle
+    page = max(0, request.args.get('archive_page', 0, type=int))
+    summary = get_dashboard_summary(current_user, page)
+    active, archived = summary['active'], summary['archived']
 
     # --- NEU: Gebannte Spieler laden ---
     # Wir holen alle Spieler, deren Bann-Zeit in der Zukunft liegt
     banned_members = TeamMember.query.filter(TeamMember.banned_until > datetime.now()).all()
 
     return render_template('dashboard/user.html',
-                           active_tournaments=active_tournaments, archived_tournaments=archived_tournaments,
-                           active_cups=active_cups, archived_cups=archived_cups,
-                           active_leagues=active_leagues, archived_leagues=archived_leagues,
+                           active_tournaments=active['tournament'], archived_tournaments=archived['tournament'],
+                           active_cups=active['cup'], archived_cups=archived['cup'],
+                           active_leagues=active['league'], archived_leagues=archived['league'],
+                           archive_page=summary['page'], archive_pages=summary['pages'],
                            banned_members=banned_members) # <--- Variable übergeben!
 
 # --- CLAN / USERS MANAGER (NEU) ---
@@ -132,18 +154,18 @@ def create_clan():
         db.session.commit()
 
         # 2. Admin User erstellen (MIT Passwort)
-        hashed_pw = generate_password_hash(password, method='pbkdf2:sha256')
+        hashed_pw = hash_password(password)
         admin_user = User(
             username=clan_name,
             password=hashed_pw,
             is_clan_admin=True,
-            clan_id=new_clan.id,
-            token=secrets.token_hex(4)
+            clan_id=new_clan.id
         )
+        token = admin_user.issue_token()
         db.session.add(admin_user)
         db.session.commit()
         
-        flash(f'Clan "{clan_name}" erstellt.', 'success')
+        flash(f'Clan "{clan_name}" erstellt. Token: {token}', 'success')
 
     except Exception as e:
         db.session.rollback()
@@ -176,8 +198,8 @@ def clan_create_team():
         flash('Name vergeben.', 'error')
         return redirect(url_for('main.clan_dashboard'))
 
-    token = secrets.token_hex(4)
-    new_team = User(username=team_name, token=token, clan_id=current_user.clan_id)
+    new_team = User(username=team_name, clan_id=current_user.clan_id)
+    token = new_team.issue_token()
     db.session.add(new_team)
     db.session.commit()
     flash(f'Team "{team_name}" erstellt! Token: {token}', 'success')
@@ -194,6 +216,17 @@ def clan_remove_member(user_id):
         flash('Team entfernt.', 'success')
     return redirect(url_for('main.clan_dashboard'))
 
+@main_bp.route('/clan/reset_token/<int:user_id>', methods=['POST'])
+@login_required
+def clan_reset_token(user_id):
+    if not current_user.is_clan_admin: return redirect(url_for('main.dashboard'))
+    user = User.query.get_or_404(user_id)
+    if user.clan_id == current_user.clan_id:
+        token = user.issue_token()
+        db.session.commit()
+        flash(f'Neues Token für "{user.username}": {token}', 'success')
+    return redirect(url_for('main.clan_dashboard'))
+
 @main_bp.route('/clan/add_member/<int:user_id>', methods=['POST'])
 @login_required
 def clan_add_member(user_id):
@@ -213,10 +246,10 @@ def clan_change_password():
     new = request.form.get('new_password')
     conf = request.form.get('confirm_password')
     
-    if not check_password_hash(current_user.password, cur) or new != conf:
+    if not verify_password(current_user.password, cur) or new != conf:
         flash('Fehler beim Passwort ändern.', 'error')
     else:
-        current_user.password = generate_password_hash(new, method='pbkdf2:sha256')
+        current_user.password = hash_password(new)
         db.session.commit()
         flash('Passwort geändert.', 'success')
     return redirect(url_for('main.clan_dashboard'))
@@ -253,8 +286,8 @@ def mod_change_password():
     cur = request.form.get('current_password')
     new = request.form.get('new_password')
     conf = request.form.get('confirm_password')
-    if check_password_hash(current_user.password, cur) and new == conf:
-        current_user.password = generate_password_hash(new, method='pbkdf2:sha256')
+    if verify_password(current_user.password, cur) and new == conf:
+        current_user.password = hash_password(new)
         db.session.commit()
         flash('Passwort geändert.', 'success')
     else:
@@ -264,8 +297,19 @@ def mod_change_password():
 # --- RULES & PWA ---
 @main_bp.route('/sw.js')
 def service_worker():
-    res = send_from_directory(os.path.join(current_app.root_path, 'static'), 'sw.js')
-    res.headers['Content-Type'] = 'application/javascript'
+    version, assets = precache_manifest(current_app.static_folder, reload=current_app.debug)
+    config = current_app.config
+    firebase_config = {
+        'apiKey': config['FIREBASE_API_KEY'],
+        'authDomain': f"{config['FIREBASE_PROJECT_ID']}.firebaseapp.com",
+        'projectId': config['FIREBASE_PROJECT_ID'],
+        'storageBucket': f"{config['FIREBASE_PROJECT_ID']}.appspot.com",
+        'messagingSenderId': config['FIREBASE_MESSAGING_SENDER_ID'],
+        'appId': config['FIREBASE_APP_ID'],
+    }
+    res = current_app.response_class(
+        render_template('sw.js', version=version, assets=assets, firebase_config=firebase_config),
+        mimetype='application/javascript')
     res.headers['Cache-Control'] = 'no-cache'
     return res
 
@@ -357,14 +401,11 @@ def upload_logo():
         return redirect(url_for('main.dashboard'))
         
     if file and allowed_file(file.filename):
-        filename = secure_filename(f"user_{current_user.id}_{secrets.token_hex(4)}.{file.filename.rsplit('.', 1)[1].lower()}")
-        upload_path = os.path.join(current_app.config['LOGO_UPLOAD_FOLDER'], filename)
-        
-        os.makedirs(current_app.config['LOGO_UPLOAD_FOLDER'], exist_ok=True)
-        
-        file.save(upload_path)
-        
-        current_user.logo_file = filename
+        try:
+            current_user.logo_file = store_image(file, 'logos')
+        except InvalidImage:
+            flash('Ungültiges Dateiformat (nur Bilder erlaubt).', 'error')
+            return redirect(url_for('main.dashboard'))
         db.session.commit()
         flash('Logo erfolgreich hochgeladen!', 'success')
     else:
@@ -393,14 +434,11 @@ def upload_clan_logo():
             flash('Clan nicht gefunden.', 'error')
             return redirect(url_for('main.clan_dashboard'))
 
-        filename = secure_filename(f"clan_{clan.id}_{secrets.token_hex(4)}.{file.filename.rsplit('.', 1)[1].lower()}")
-        upload_path = os.path.join(current_app.config['LOGO_UPLOAD_FOLDER'], filename)
-        
-        os.makedirs(current_app.config['LOGO_UPLOAD_FOLDER'], exist_ok=True)
-        
-        file.save(upload_path)
-        
-        clan.logo_file = filename
+        try:
+            clan.logo_file = store_image(file, 'logos')
+        except InvalidImage:
+            flash('Ungültiges Dateiformat.', 'error')
+            return redirect(url_for('main.clan_dashboard'))
         db.session.commit()
         flash('Clan Logo erfolgreich hochgeladen!', 'success')
     else:
@@ -1,20 +1,16 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, abort
 from flask_login import login_required, current_user
-from app.models import db, Ticket, TicketMessage, User, LeagueMatch
+from app.models import db, Ticket, TicketMessage, LeagueMatch
 from app.utils import get_current_time
-from app.firebase_utils import send_push_notification
+from app.push import notify_staff, notify_users
 
 tickets = Blueprint('tickets', __name__)
 
 def notify_admins(title, body, url=None):
-    admins = User.query.filter((User.is_admin == True) | (User.is_mod == True)).all()
-    for admin in admins:
-        if admin.fcm_token:
-            send_push_notification(admin.fcm_token, title, body, data={'url': url} if url else None)
+    notify_staff(title, body, url)
 
 def notify_user(user, title, body, url=None):
-    if user.fcm_token:
-        send_push_notification(user.fcm_token, title, body, data={'url': url} if url else None)
+    notify_users([user], title, body, url)
 
 @tickets.route('/tickets')
 @login_required
@@ -1,8 +1,12 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
 from app.models import Tournament, Match, User, Map
 from app.extensions import db
-import json, random, math
+from app.database import wants_json
+from app.routes.api import match_state_payload
+from app.team_resolver import get_team_resolver
+from app.bracket import build_bracket, propagate, recalculate_tournament
+import json, random
 
 tournament_bp = Blueprint('tournament', __name__)
 
@@ -30,8 +34,7 @@ def tournament_tree(tournament_id):
         # Finde alle Matches, wo der User beteiligt ist UND die noch nicht vorbei sind
         my_matches = [
             m for m in tournament.matches 
-            if (m.team_a == current_user.username or m.team_b == current_user.username) 
-            and m.state != 'finished'
+            if m.is_participant(current_user) and m.state != 'finished'
         ]
         
         # Wenn es Matches gibt, ist das mit der niedrigsten Rundennummer das nächste
@@ -39,13 +42,21 @@ def tournament_tree(tournament_id):
             my_matches.sort(key=lambda x: x.round_number)
             next_match = my_matches[0]
 
-    return render_template('tournament/view.html', tournament=tournament, rounds=sorted_rounds, next_match=next_match)
+    # Alle Teams des Baums mit einem Query laden (Clan + Logo)
+    teams = get_team_resolver().prime_matches(tournament.matches)
+
+    return render_template('tournament/view.html', tournament=tournament, rounds=sorted_rounds, next_match=next_match, teams=teams)
 
 # --- PICK / BAN LOGIK (Kopie aus league.py wie gewünscht) ---
 def handle_pick_ban_logic(match, selected_map):
     current_banned = match.get_banned()
     current_picked = match.get_picked()
+    veto_state = match.state
     
+    # Veto schon vorbei (z.B. Klick, der nach dem letzten Pick ankommt)
+    if not veto_state.startswith(('ban_', 'pick_')):
+        return False, "Map-Veto ist bereits abgeschlossen."
+
     # Prüfen, ob Karte schon weg ist
     if selected_map in current_banned or selected_map in current_picked: 
         return False, "Karte bereits vergeben."
@@ -80,43 +91,25 @@ def handle_pick_ban_logic(match, selected_map):
         # 2 von A + 2 von B = 4 Karten total -> Scoring
         if len(current_picked) >= 4: match.state = 'scoring_phase'
     
-    match.banned_maps = json.dumps(current_banned)
-    match.picked_maps = json.dumps(current_picked)
+    # Nur die neue Aktion anhängen (MapVeto-Zeile statt JSON neu schreiben)
+    if veto_state.startswith('ban_'): match.add_veto('ban', selected_map, team=veto_state[-1])
+    elif veto_state.startswith('pick_'): match.add_veto('pick', selected_map, team=veto_state[-1])
     return True, "Erfolgreich."
 
-def advance_winner(match):
-    if not match.next_match_id: return
-    nm = Match.query.get(match.next_match_id)
-    if not nm: return
-    
-    wa, wb = match.get_map_wins()
-    if wa > wb: win = match.team_a
-    elif wb > wa: win = match.team_b
-    else: win = match.team_a if match.total_score_a > match.total_score_b else match.team_b
-
-    if match.match_index % 2 == 0: nm.team_a = win
-    else: nm.team_b = win
-    
-    # Wenn beide Gegner im nächsten Match feststehen, startet Ban Phase
-    if nm.team_a != "TBD" and nm.team_b != "TBD": 
-        nm.state = 'ban_1_a'
-        
-    db.session.commit()
-
 def handle_scoring_logic(match, form_data, user):
+    """Gibt die Folge-Matches zurück, die sich durch das Ergebnis geändert haben."""
     try:
         sa = [max(0, int(form_data.get(f'score_a_{i}',0))) for i in range(1, 6)]
         sb = [max(0, int(form_data.get(f'score_b_{i}',0))) for i in range(1, 6)]
-    except: return
+    except: return []
     
     if user.is_admin or user.is_mod:
         match.scores_a = json.dumps(sa); match.scores_b = json.dumps(sb)
-        match.state = 'finished'; match.draft_a_scores=None; match.draft_b_scores=None
-        advance_winner(match)
-        return
+        match.state = 'finished'; match.walkover = None; match.draft_a_scores=None; match.draft_b_scores=None
+        return propagate([match])
         
     isa = (user.username == match.team_a); isb = (user.username == match.team_b)
-    if not (isa or isb): return
+    if not (isa or isb): return []
     
     bundle = {'a':sa, 'b':sb}
     if isa: match.draft_a_scores = json.dumps(bundle)
@@ -124,47 +117,31 @@ def handle_scoring_logic(match, form_data, user):
     
     if match.draft_a_scores and match.draft_b_scores:
         if match.draft_a_scores == match.draft_b_scores:
-            match.scores_a = json.dumps(sa); match.scores_b = json.dumps(sb); match.state = 'finished'; advance_winner(match)
+            match.scores_a = json.dumps(sa); match.scores_b = json.dumps(sb); match.state = 'finished'
+            return propagate([match])
         else: match.state = 'conflict'
     else: match.state = 'waiting_for_confirmation'
+    return []
+
+def report_bracket_changes(changed):
+    if changed:
+        flash(f"Turnierbaum aktualisiert: {len(changed)} Folge-Match(es) neu besetzt.", "info")
 
 @tournament_bp.route('/create_tournament', methods=['GET', 'POST'])
 @login_required
 def create_tournament():
     if not current_user.is_admin: return redirect(url_for('main.dashboard'))
     if request.method == 'POST':
-        sel = request.form.getlist('selected_users'); random.shuffle(sel)
-        # Power of 2 Check (vereinfacht: fülle mit "BYE" auf wenn nötig, hier basic)
-        t = Tournament(name=request.form.get('tournament_name')); db.session.add(t); db.session.commit()
-        
-        # Runde 1 erstellen
-        for i in range(0, len(sel), 2): 
-            # Falls ungerade Anzahl: Letzter kriegt Freilos (hier vereinfacht angenommen gerade oder Modulo Logik)
-            p1 = sel[i]
-            p2 = sel[i+1] if i+1 < len(sel) else "BYE"
-            # State ist ban_1_a
-            db.session.add(Match(tournament_id=t.id, team_a=p1, team_b=p2, state='ban_1_a', round_number=1, match_index=i//2))
+        sel = request.form.getlist('selected_users'); random.shuffle(sel)  # Zufällige Setzliste
+        if len(sel) < 2:
+            flash("Ein Turnier braucht mindestens 2 Teams.", "error")
+            return redirect(url_for('tournament.create_tournament'))
+
+        # Kompletter Baum im Speicher, Freilose auf 2^n aufgefüllt; ein Flush, ein Commit
+        t = Tournament(name=request.form.get('tournament_name')); db.session.add(t)
+        build_bracket(t, sel)
         db.session.commit()
-        
-        # Folgerunden generieren (Logarithmus zur Basis 2)
-        prev = [m for m in t.matches if m.round_number==1]
-        rounds_total = int(math.ceil(math.log2(len(sel))))
-        
-        for r in range(2, rounds_total + 1):
-            curr = []
-            matches_in_round = len(prev)//2 + len(prev)%2
-            for i in range(matches_in_round):
-                # TBD vs TBD
-                db.session.add(Match(tournament_id=t.id, team_a="TBD", team_b="TBD", state='waiting', round_number=r, match_index=i))
-                curr.append(Match.query.all()[-1]) # Hacky um ID zu bekommen
-            db.session.commit()
-            
-            # Verknüpfung setzen
-            for idx, pm in enumerate(prev):
-                pm.next_match_id = curr[idx//2].id
-            db.session.commit()
-            prev = curr
-            
+
         return redirect(url_for('main.dashboard'))
     return render_template('tournament/create.html', users=User.query.filter_by(is_admin=False, is_mod=False).all())
 
@@ -180,18 +157,37 @@ def match_view(match_id):
     active = match.team_a if match.state.endswith('_a') else (match.team_b if match.state.endswith('_b') else None)
     
     if request.method == 'POST':
-        if 'selected_map' in request.form and (current_user.is_admin or current_user.username == active):
-            success, msg = handle_pick_ban_logic(match, request.form.get('selected_map'))
+        if 'selected_map' in request.form:
+            if current_user.is_admin or current_user.username == active:
+                success, msg = handle_pick_ban_logic(match, request.form.get('selected_map'))
+            else: success, msg = False, "Du bist gerade nicht am Zug."
             if success: db.session.commit()
-            else: flash(msg, "error")
+            # Lobby-JS klickt per fetch: Ergebnis + aktueller Stand statt Redirect (409 siehe database.py)
+            if wants_json(): return jsonify({'status': 'ok' if success else 'error', 'msg': msg, 'state': match_state_payload(match)})
+            if not success: flash(msg, "error")
         elif 'submit_scores' in request.form:
-            handle_scoring_logic(match, request.form, current_user); db.session.commit()
+            changed = handle_scoring_logic(match, request.form, current_user); db.session.commit()
+            report_bracket_changes(changed)
+        elif 'walkover' in request.form and (current_user.is_admin or current_user.is_mod):
+            if request.form.get('walkover') in ('a', 'b'):
+                match.walkover = request.form.get('walkover'); match.state = 'finished'
+                changed = propagate([match]); db.session.commit()
+                flash("Walkover eingetragen.", "success"); report_bracket_changes(changed)
         elif 'lobby_code' in request.form:
             match.lobby_code = request.form.get('lobby_code'); db.session.commit()
         return redirect(url_for('tournament.match_view', match_id=match.id))
         
+    get_team_resolver().prime_matches([match])
     return render_template('tournament/match.html', match=match, all_maps=Map.query.filter_by(is_archived=False).all(), banned=match.get_banned(), picked=match.get_picked(), active_team=active)
 
+@tournament_bp.route('/recalculate_tournament/<int:t_id>', methods=['POST'])
+@login_required
+def recalculate_bracket(t_id):
+    if current_user.is_admin:
+        changed = recalculate_tournament(Tournament.query.get_or_404(t_id)); db.session.commit()
+        report_bracket_changes(changed)
+    return redirect(url_for('tournament.tournament_tree', tournament_id=t_id))
+
 @tournament_bp.route('/archive_tournament/<int:t_id>', methods=['POST'])
 @login_required
 def archive_tournament(t_id):
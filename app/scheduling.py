@@ -0,0 +1,67 @@
+from collections import namedtuple
+from itertools import islice
+from sqlalchemy import select
+
+from .extensions import db
+
+Fixture = namedtuple('Fixture', 'round team_a team_b')
+
+# Zeilen pro executemany; eine 100er-Liga (4.950 Matches) passt in einen Aufruf
+BULK_CHUNK = 5000
+
+
+def round_robin(teams, double=False):
+    """
+    Jeder gegen jeden (Circle-Methode) als Generator: es werden keine Match-Objekte
+    erzeugt, bis der Aufrufer sie braucht. Bei ungerader Teamzahl hat pro Runde ein
+    Team spielfrei. double=True hängt die Rückrunde mit getauschtem Heimrecht an.
+    """
+    teams = list(teams)
+    if len(teams) % 2 != 0: teams.append(None)  # Spielfrei-Platzhalter
+    n = len(teams)
+    rounds = n - 1
+
+    for leg in range(2 if double else 1):
+        rotation = list(teams)
+        for r in range(rounds):
+            for i in range(n // 2):
+                t1, t2 = rotation[i], rotation[n - 1 - i]
+                if t1 and t2:
+                    yield Fixture(leg * rounds + r + 1, *((t2, t1) if leg else (t1, t2)))
+            rotation.insert(1, rotation.pop())  # Rotation (ausgenommen 1. Element)
+
+
+def schedule_summary(teams, double=False):
+    """Kennzahlen eines Spielplans ohne ihn zu erzeugen."""
+    count = len(teams)
+    legs = 2 if double else 1
+    slots = count + (count % 2)
+    return {'teams': count,
+            'weeks': (slots - 1) * legs if count > 1 else 0,
+            'matches': count * (count - 1) // 2 * legs}
+
+
+def team_id_map(names):
+    """Username -> User-ID für alle Teams in einem Query."""
+    from .models import User
+    return dict(db.session.execute(select(User.username, User.id).where(User.username.in_(set(names)))).all())
+
+
+def bulk_insert_fixtures(model, fixtures, team_ids, round_columns=('round_number',), **values):
+    """
+    Schreibt Fixtures per executemany direkt in die Tabelle von `model` (ohne ORM-Objekte
+    und ohne Flush pro Match). Commit übernimmt der Aufrufer. Gibt die Anzahl zurück.
+    """
+    table = model.__table__
+    fixtures = iter(fixtures)
+    total = 0
+    while True:
+        rows = [dict(values,
+                     team_a=f.team_a, team_b=f.team_b,
+                     team_a_id=team_ids.get(f.team_a), team_b_id=team_ids.get(f.team_b),
+                     **{col: f.round for col in round_columns})
+                for f in islice(fixtures, BULK_CHUNK)]
+        if not rows:
+            return total
+        db.session.execute(table.insert(), rows)
+        total += len(rows)
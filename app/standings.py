@@ -0,0 +1,98 @@
+from collections import Counter, defaultdict
+from sqlalchemy import delete, event, inspect, select, update
+from sqlalchemy.orm import Session
+
+from .extensions import db
+from .models import LeagueMatch, LeagueStanding
+from .scheduling import team_id_map
+from .utils import calculate_map_wins, safe_json_load, sum_scores
+
+STAT_FIELDS = ('played', 'won_matches', 'lost_matches', 'draw_matches', 'own_score', 'opp_score')
+
+# Spalten, deren Änderung die Tabelle beeinflussen kann
+TRACKED_FIELDS = ('state', 'team_a', 'team_b', 'scores_a', 'scores_b')
+
+
+def match_contribution(state, team_a, team_b, scores_a, scores_b):
+    """Beitrag eines Matches zur Tabelle als {team: Counter}; leer, solange es nicht beendet ist."""
+    if state != 'finished':
+        return {}
+    sa, sb = safe_json_load(scores_a), safe_json_load(scores_b)
+    wa, wb = calculate_map_wins(sa, sb)
+    sum_a, sum_b = sum_scores(sa), sum_scores(sb)
+    return {
+        team_a: Counter(played=1, won_matches=int(wa > wb), lost_matches=int(wb > wa),
+                        draw_matches=int(wa == wb), own_score=sum_a, opp_score=sum_b),
+        team_b: Counter(played=1, won_matches=int(wb > wa), lost_matches=int(wa > wb),
+                        draw_matches=int(wa == wb), own_score=sum_b, opp_score=sum_a),
+    }
+
+
+def rebuild_league_standings(league):
+    """Berechnet die Tabelle einer Liga komplett neu (Reparatur / Altbestand)."""
+    totals = {team: Counter() for team in league.get_participants()}
+    for m in league.matches:
+        for team, delta in match_contribution(m.state, m.team_a, m.team_b, m.scores_a, m.scores_b).items():
+            if team in totals:
+                totals[team].update(delta)
+
+    ids = team_id_map(totals)
+    db.session.execute(delete(LeagueStanding).where(LeagueStanding.league_id == league.id))
+    if totals:
+        db.session.execute(LeagueStanding.__table__.insert(), [
+            dict(league_id=league.id, team=team, team_id=ids.get(team), **{f: stats[f] for f in STAT_FIELDS})
+            for team, stats in totals.items()])
+    db.session.expire(league, ['standings'])
+
+
+def get_league_table(league):
+    """
+    Tabellenzeilen sortiert wie bisher (Score absteigend). Nur lesend: angelegt werden die Zeilen
+    beim Erstellen der Liga, für Altbestand von db_upgrade.py bzw. `flask rebuild-standings`.
+    """
+    return LeagueStanding.query.filter_by(league_id=league.id).order_by(LeagueStanding.own_score.desc(), LeagueStanding.id).all()
+
+
+def _tracked_change(match):
+    attrs = inspect(match).attrs
+    return any(attrs[f].history.has_changes() for f in TRACKED_FIELDS)
+
+
+@event.listens_for(Session, 'before_flush')
+def _update_standings(session, flush_context, instances):
+    changed = [m for m in session.dirty if isinstance(m, LeagueMatch) and _tracked_change(m)]
+    created = [m for m in session.new if isinstance(m, LeagueMatch) and m.state == 'finished']
+    if not changed and not created:
+        return
+
+    deltas = defaultdict(Counter)
+    with session.no_autoflush:
+        if changed:
+            # Alter Stand direkt aus der DB (vor diesem Flush)
+            cols = [getattr(LeagueMatch, f) for f in TRACKED_FIELDS]
+            old_rows = session.execute(
+                select(LeagueMatch.league_id, *cols).where(LeagueMatch.id.in_([m.id for m in changed]))
+            ).all()
+            for league_id, *old in old_rows:
+                for team, delta in match_contribution(*old).items():
+                    deltas[(league_id, team)].subtract(delta)
+
+        for m in changed + created:
+            for team, delta in match_contribution(m.state, m.team_a, m.team_b, m.scores_a, m.scores_b).items():
+                deltas[(m.league_id, team)].update(delta)
+
+        deltas = {k: d for k, d in deltas.items() if any(d.values())}
+        # Inkrement in der DB (played = played + 1) statt Lesen-Ändern-Schreiben in Python:
+        # zwei Worker, die gleichzeitig ein Match desselben Teams abschließen, verlieren keinen Wert.
+        # Nur Teilnehmer mit Tabellenzeile zählen (wie bisher: Nicht-Teilnehmer werden ignoriert)
+        for (league_id, team), delta in deltas.items():
+            session.execute(
+                update(LeagueStanding)
+                .where(LeagueStanding.league_id == league_id, LeagueStanding.team == team)
+                .values({f: getattr(LeagueStanding, f) + delta[f] for f in STAT_FIELDS if delta[f]})
+                .execution_options(synchronize_session=False))
+
+    # Bereits geladene Tabellenzeilen beim nächsten Zugriff neu lesen
+    for obj in list(session.identity_map.values()):
+        if isinstance(obj, LeagueStanding) and (obj.__dict__.get('league_id'), obj.__dict__.get('team')) in deltas:
+            session.expire(obj)
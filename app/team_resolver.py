@@ -0,0 +1,89 @@
+from flask import g, has_app_context
+from sqlalchemy import or_
+from sqlalchemy.orm import joinedload
+
+# Platzhalter im Bracket, hinter denen kein User steht
+PLACEHOLDER_TEAMS = {'TBD', 'BYE'}
+
+
+class TeamIdentity:
+    """Snapshot eines Teams (User + Clan + effektives Logo) für die Anzeige."""
+    __slots__ = ('username', 'user_id', 'clan_name', 'logo')
+
+    def __init__(self, username, user_id=None, clan_name=None, logo=None):
+        self.username = username
+        self.user_id = user_id
+        self.clan_name = clan_name
+        self.logo = logo
+
+    @classmethod
+    def from_user(cls, user):
+        clan = user.clan
+        logo = user.logo_file or (clan.logo_file if clan else None)
+        return cls(user.username, user.id, clan.name if clan else None, logo)
+
+
+class TeamResolver:
+    """
+    Löst Team-Namen gesammelt auf: Alle Teams einer Seite werden mit EINEM Query
+    (User + Clan per JOIN) geladen, statt pro Match-Property einzeln.
+    """
+
+    def __init__(self):
+        self._teams = {}
+
+    def prime(self, names, ids=None):
+        """
+        Lädt alle noch unbekannten Namen in einem Query nach.
+        ids: optionales Mapping Name -> User-ID (FK der Match-Tabellen); diese Teams
+        werden per Primärschlüssel geladen und bleiben auch nach Umbenennung auffindbar.
+        """
+        ids = ids or {}
+        missing = {n for n in names if n and n not in PLACEHOLDER_TEAMS and n not in self._teams}
+        if not missing:
+            return self
+
+        from .models import User
+        by_id = {ids[n]: n for n in missing if ids.get(n)}
+        by_name = missing - set(by_id.values())
+        users = User.query.options(joinedload(User.clan)).filter(
+            or_(User.id.in_(by_id), User.username.in_(by_name))
+        ).all()
+        for u in users:
+            self._teams[by_id.get(u.id, u.username)] = TeamIdentity.from_user(u)
+        # Unbekannte Namen merken, damit sie nicht erneut abgefragt werden
+        for n in missing:
+            self._teams.setdefault(n, TeamIdentity(n))
+        return self
+
+    def prime_matches(self, matches):
+        """Sammelt team_a/team_b aller Matches und lädt sie gebündelt."""
+        ids = {}
+        for m in matches:
+            ids.setdefault(m.team_a, m.team_a_id)
+            ids.setdefault(m.team_b, m.team_b_id)
+        return self.prime(ids.keys(), ids)
+
+    def get(self, name):
+        if not name or name in PLACEHOLDER_TEAMS:
+            return TeamIdentity(name)
+        if name not in self._teams:
+            self.prime([name])
+        return self._teams[name]
+
+    __getitem__ = get
+
+    def clan(self, name):
+        return self.get(name).clan_name
+
+    def logo(self, name):
+        return self.get(name).logo
+
+
+def get_team_resolver():
+    """Liefert den Resolver des aktuellen Requests (außerhalb eines Kontexts: frische Instanz)."""
+    if not has_app_context():
+        return TeamResolver()
+    if 'team_resolver' not in g:
+        g.team_resolver = TeamResolver()
+    return g.team_resolver
@@ -0,0 +1,103 @@
+// Service Worker: Push-Nachrichten (Firebase Messaging) + Caching statischer Dateien.
+// Wird vom Server gerendert (main.service_worker); VERSION/ASSETS ändern sich mit dem
+// Inhalt der Dateien, dadurch installiert der Browser automatisch einen neuen Worker.
+importScripts('https://www.gstatic.com/firebasejs/8.10.1/firebase-app.js');
+importScripts('https://www.gstatic.com/firebasejs/8.10.1/firebase-messaging.js');
+
+const VERSION = {{ version|tojson }};
+const STATIC_CACHE = 'infernus-static-' + VERSION;
+const IMAGE_CACHE = 'infernus-images-v1';
+const IMAGE_CACHE_LIMIT = 200;
+
+// URL -> Cache-Schlüssel mit Content-Hash (z.B. /static/style.css?v=1a2b3c4d5e6f)
+const ASSETS = new Map([
+{%- for url, hash in assets %}
+  [{{ url|tojson }}, {{ (url ~ '?v=' ~ hash)|tojson }}]{{ ',' if not loop.last }}
+{%- endfor %}
+]);
+
+// Map-Bilder und Logos: stale-while-revalidate
+const IMAGE_PATHS = ['/static/map_images/', '/static/logos/'];
+
+// --- PUSH ---
+firebase.initializeApp({{ firebase_config|tojson }});
+
+const messaging = firebase.messaging();
+
+messaging.onBackgroundMessage((payload) => {
+  console.log('[sw.js] Received background message ', payload);
+  const notificationTitle = payload.notification.title;
+  const notificationOptions = {
+    body: payload.notification.body,
+    icon: '/static/icons/icon-192.png'
+  };
+
+  self.registration.showNotification(notificationTitle, notificationOptions);
+});
+
+// --- CACHING ---
+self.addEventListener('install', event => {
+  event.waitUntil((async () => {
+    const cache = await caches.open(STATIC_CACHE);
+    await Promise.all([...ASSETS.values()].map(async key => {
+      // Unveränderte Dateien (gleicher Hash) aus dem alten Cache übernehmen statt neu laden
+      const cached = await caches.match(key);
+      if (cached) return cache.put(key, cached);
+      const response = await fetch(key, { cache: 'reload' });
+      if (response.ok) await cache.put(key, response);
+    }));
+    await self.skipWaiting();
+  })());
+});
+
+self.addEventListener('activate', event => {
+  event.waitUntil((async () => {
+    // Alte Versionen (und den früheren 'tournament-v1'-Cache mit HTML) entfernen
+    const keep = [STATIC_CACHE, IMAGE_CACHE];
+    for (const name of await caches.keys()) {
+      if (!keep.includes(name)) await caches.delete(name);
+    }
+    await self.clients.claim();
+  })());
+});
+
+async function trimCache(name, limit) {
+  const cache = await caches.open(name);
+  const keys = await cache.keys();
+  for (const request of keys.slice(0, Math.max(0, keys.length - limit))) {
+    await cache.delete(request);
+  }
+}
+
+async function staleWhileRevalidate(event) {
+  const cache = await caches.open(IMAGE_CACHE);
+  const cached = await cache.match(event.request);
+  const network = fetch(event.request).then(async response => {
+    if (response.ok) {
+      await cache.put(event.request, response.clone());
+      await trimCache(IMAGE_CACHE, IMAGE_CACHE_LIMIT);
+    }
+    return response;
+  });
+  if (cached) {
+    event.waitUntil(network.catch(() => null));
+    return cached;
+  }
+  return network;
+}
+
+self.addEventListener('fetch', event => {
+  const request = event.request;
+  const url = new URL(request.url);
+  // Nur eigene GET-Requests auf /static – HTML-Seiten und /api gehen immer ans Netz
+  if (request.method !== 'GET' || url.origin !== self.location.origin || !url.pathname.startsWith('/static/')) {
+    return;
+  }
+
+  const key = ASSETS.get(url.pathname);
+  if (key) {
+    event.respondWith(caches.match(key).then(cached => cached || fetch(request)));
+  } else if (IMAGE_PATHS.some(prefix => url.pathname.startsWith(prefix))) {
+    event.respondWith(staleWhileRevalidate(event));
+  }
+});
@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from .extensions import db
+from .models import User
+
+
+class UserCache:
+    """
+    Begrenzter TTL-Cache für den user_loader: pro User-ID ein Snapshot der Spaltenwerte
+    (keine ORM-Objekte, damit nichts zwischen Sessions/Threads geteilt wird).
+    Einträge fliegen raus, sobald ein Commit den User ändert (Rollen, Clan, Logo,
+    Passwort, FCM-Token, ...). Die Generation zählt Invalidierungen mit, damit ein
+    Snapshot, der vor einer Invalidierung geladen wurde, nicht nachträglich wieder
+    im Cache landet.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._generation = 0
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def get(self, user_id, ttl):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] >= ttl:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[1]
+
+    def set(self, user_id, snapshot, max_size, generation):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[user_id] = (time.monotonic(), snapshot)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_ids):
+        with self._lock:
+            self._generation += 1
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+cache = UserCache()
+
+_COLUMNS = [attr.key for attr in inspect(User).column_attrs]
+
+# Rechte und Login-Daten werden bei jedem Request frisch gelesen (Primärschlüssel-Lookup),
+# damit Änderungen aus anderen Worker-Prozessen sofort greifen
+_AUTH_COLUMNS = (User.password, User.token_hash, User.is_admin, User.is_mod,
+                 User.clan_id, User.is_clan_admin)
+
+
+def load_cached_user(user_id):
+    """
+    User für Flask-Login: Snapshot aus dem Cache, ergänzt um die frisch gelesenen
+    Rechte-/Login-Spalten, ohne weitere Query an die Session gehängt; sonst aus der DB.
+    """
+    config = current_app.config
+    snapshot = cache.get(user_id, config['USER_CACHE_SECONDS'])
+    if snapshot is not None:
+        auth = db.session.execute(select(*_AUTH_COLUMNS).where(User.id == user_id)).first()
+        if auth is None:
+            # In einem anderen Worker gelöscht
+            cache.invalidate([user_id])
+            return None
+        auth = auth._asdict()
+        if any(snapshot[key] != value for key, value in auth.items()):
+            # Rest des Snapshots (Name, Logo, ...) beim nächsten Request neu laden
+            cache.invalidate([user_id])
+        user = User(**{**snapshot, **auth})
+        make_transient_to_detached(user)
+        # load=False: kein SELECT; Änderungen an current_user werden normal geflusht
+        return db.session.merge(user, load=False)
+
+    generation = cache.generation
+    user = db.session.get(User, user_id)
+    if user is not None:
+        cache.set(user_id, {key: getattr(user, key) for key in _COLUMNS}, config['USER_CACHE_SIZE'], generation)
+    return user
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_users(session, flush_context):
+    ids = {obj.id for obj in list(session.dirty) + list(session.deleted)
+           if isinstance(obj, User) and obj.id is not None}
+    if ids:
+        session.info.setdefault('changed_users', set()).update(ids)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_users(session):
+    ids = session.info.pop('changed_users', None)
+    if ids:
+        cache.invalidate(ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changed_users(session):
+    session.info.pop('changed_users', None)
@@ -1,4 +1,6 @@
 import json
+import hashlib
+import hmac
 from functools import wraps
 from flask import redirect, url_for, session, flash
 from datetime import datetime
@@ -17,6 +19,10 @@ def strip_clan_tag(username):
         return username.split('.', 1)[1]
     return username
 
+def hash_token(token):
+    """Keyed Hash (HMAC-SHA256 mit SECRET_KEY) eines Team-Tokens; indexierbar für den Login."""
+    return hmac.new(Config.SECRET_KEY.encode(), str(token).encode(), hashlib.sha256).hexdigest()
+
 def get_current_time():
     """Returns the current time in the configured timezone."""
     tz = zoneinfo.ZoneInfo(Config.TIMEZONE)
@@ -25,6 +31,14 @@ def get_current_time():
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def sum_scores(scores):
+    """Summe einer Score-Liste; nicht numerische Einträge werden ignoriert."""
+    total = 0
+    for s in scores or []:
+        try: total += int(s)
+        except (ValueError, TypeError): continue
+    return total
+
 def calculate_map_wins(scores_a, scores_b):
     """
     Berechnet die Siege basierend auf zwei Listen von Scores.
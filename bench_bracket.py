@@ -0,0 +1,64 @@
+"""
+Benchmark für den Bracket-Builder gegen eine temporäre SQLite-Datenbank.
+
+    python bench_bracket.py                 # 8 .. 1024 Teilnehmer
+    python bench_bracket.py 16 300 1024     # eigene Größen
+
+Gemessen wird Aufbau + Commit eines Turniers; vorher angelegte Turniere bleiben in der
+DB liegen, damit sichtbar wird, dass die Laufzeit nicht mit dem Altbestand wächst.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import config
+
+DEFAULT_SIZES = [8, 16, 32, 64, 128, 256, 512, 1024]
+
+
+def main(sizes):
+    tmp = tempfile.mkdtemp()
+    config.Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+
+    from sqlalchemy import event
+    from app import create_app
+    from app.extensions import db
+    from app.models import Tournament, Match, User
+    from app.bracket import build_bracket, bracket_size, TBD, BYE
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add_all(User(username=f'Team{i}', password='-') for i in range(max(sizes)))
+        db.session.commit()
+
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(1))
+
+        print(f"{'Teams':>6} {'Matches':>8} {'Queries':>8} {'Zeit':>9}")
+        for n in sizes:
+            entrants = [f'Team{i}' for i in range(n)]
+            statements.clear()
+            start = time.perf_counter()
+            t = Tournament(name=f'Bench {n}')
+            db.session.add(t)
+            build_bracket(t, entrants)
+            db.session.commit()
+            elapsed = time.perf_counter() - start
+
+            matches = Match.query.filter_by(tournament_id=t.id).all()
+            by_id = {m.id: m for m in matches}
+            finals = [m for m in matches if m.next_match_id is None]
+            assert len(matches) == bracket_size(n) - 1, "Matchanzahl"
+            assert len(finals) == 1, "genau ein Finale"
+            assert all(m.next_match_id in by_id for m in matches if m.next_match_id), "Links zeigen ins Turnier"
+            assert all(m.state == 'finished' for m in matches if BYE in (m.team_a, m.team_b)), "Freilose entschieden"
+            assert not [m for m in matches if m.round_number == 2 and m.state == 'ban_1_a' and TBD in (m.team_a, m.team_b)]
+            print(f"{n:>6} {len(matches):>8} {len(statements):>8} {elapsed * 1000:>7.1f}ms")
+            db.session.expunge_all()
+    print("🏁 Fertig.")
+
+
+if __name__ == '__main__':
+    main([int(a) for a in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,159 @@
+"""
+Hammer-Test für das Map-Veto: viele Threads klicken gleichzeitig in EINER Lobby.
+
+    python bench_lobby.py                       # Turnier-Lobby, 12 Threads, 5 Runden
+    python bench_lobby.py --league              # Liga-Lobby
+    python bench_lobby.py --threads 24 --rounds 20
+
+Admin und beide Captains klicken parallel wie die Lobby-JS (POST mit Accept: application/json,
+bei 409 kurz warten und erneut senden). Danach wird die Veto-Liste gegen den Ablauf geprüft
+(2 Bans pro Team und Runde, dann 2 Picks pro Team): kein verlorener oder doppelter Bann,
+keine übersprungene Phase, lückenlose seq, genau ein Veto pro erfolgreichem Klick.
+Exit-Code 1 bei Fehlern.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import config
+
+# Erwarteter Ablauf als (Team, Aktion) pro Veto
+SEQUENCE = [('a', 'ban')] * 2 + [('b', 'ban')] * 2 + [('a', 'ban')] * 2 + [('b', 'ban')] * 2 \
+    + [('a', 'pick')] * 2 + [('b', 'pick')] * 2
+MAPS = [f'Map {i:02d}' for i in range(16)]
+
+
+def check_vetoes(match):
+    """Liste der Abweichungen zwischen gespeicherten Vetos und erwartetem Ablauf."""
+    problems = []
+    vetoes = list(match.vetoes)
+    if len(vetoes) != len(SEQUENCE):
+        problems.append(f"{len(vetoes)} Vetos statt {len(SEQUENCE)}")
+    for i, (veto, expected) in enumerate(zip(vetoes, SEQUENCE)):
+        if veto.seq != i:
+            problems.append(f"seq {veto.seq} an Position {i}")
+        if (veto.team, veto.action) != expected:
+            problems.append(f"Veto {i}: {veto.action} von {veto.team}, erwartet {expected[1]} von {expected[0]}")
+    names = [v.map_name for v in vetoes]
+    if len(set(names)) != len(names):
+        problems.append("Karte mehrfach vergeben")
+    if match.state != 'scoring_phase':
+        problems.append(f"Endstatus {match.state}")
+    return problems
+
+
+def main(args):
+    tmp = tempfile.mkdtemp()
+    config.Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'lobby.db')
+    config.Config.SQLALCHEMY_ENGINE_OPTIONS = {'pool_size': args.threads + 2, 'max_overflow': 0}
+    config.Config.PASSWORD_HASH_WORKERS = 0
+
+    from werkzeug.security import generate_password_hash
+    from app import create_app
+    from app.extensions import db
+    from app.models import User, Map, Tournament, Match, League, LeagueMatch
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        pw = generate_password_hash('pw', method='pbkdf2:sha256:1000')
+        db.session.add_all([User(username='admin', password=pw, is_admin=True),
+                            User(username='Alpha', password=pw), User(username='Bravo', password=pw)])
+        db.session.add_all([Map(name=name) for name in MAPS])
+        db.session.commit()
+
+    def new_lobby():
+        with app.app_context():
+            if args.league:
+                league = League(name='Hammer')
+                match = LeagueMatch(team_a='Alpha', team_b='Bravo', state='ban_1_a', ready_a=True, ready_b=True)
+                league.matches.append(match)
+                db.session.add(league)
+            else:
+                tournament = Tournament(name='Hammer')
+                match = Match(team_a='Alpha', team_b='Bravo', state='ban_1_a', round_number=1, match_index=0)
+                tournament.matches.append(match)
+                db.session.add(tournament)
+            db.session.commit()
+            prefix = 'league_match' if args.league else 'match'
+            return match.id, f'/{prefix}/{match.id}', f'/api/{prefix}/{match.id}/state'
+
+    # Ein eingeloggter Client pro Thread: reihum Admin, Captain A, Captain B
+    users = ['admin', 'Alpha', 'Bravo']
+    clients = []
+    for n in range(args.threads):
+        client = app.test_client()
+        client.post('/login', data={'username': users[n % 3], 'password': 'pw'})
+        clients.append(client)
+
+    counts = Counter()
+    lock = threading.Lock()
+    failures = []
+
+    def clicker(client, url, state_url, seed):
+        rng = random.Random(seed)
+        while True:
+            data = client.get(state_url).get_json()
+            if 'ban' not in data['state'] and 'pick' not in data['state']:
+                return
+            taken = set(data['banned']) | set(data['picked'])
+            choice = rng.choice([m for m in MAPS if m not in taken])
+            for attempt in range(4):
+                res = client.post(url, data={'selected_map': choice}, headers={'Accept': 'application/json'})
+                if res.status_code != 409:
+                    break
+                with lock:
+                    counts['409'] += 1
+                time.sleep(0.01 * (attempt + 1) * rng.random())
+            body = res.get_json(silent=True) or {}
+            with lock:
+                if res.status_code == 200 and body.get('status') in ('ok', 'error'):
+                    counts[body['status']] += 1
+                elif res.status_code == 409:
+                    counts['aufgegeben'] += 1
+                else:
+                    counts['fehler'] += 1
+                    failures.append(f"HTTP {res.status_code}")
+
+    started = time.perf_counter()
+    for r in range(args.rounds):
+        match_id, url, state_url = new_lobby()
+        ok_before = counts['ok']
+        threads = [threading.Thread(target=clicker, args=(c, url, state_url, r * 1000 + n))
+                   for n, c in enumerate(clients)]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        with app.app_context():
+            match = db.session.get(LeagueMatch if args.league else Match, match_id)
+            problems = check_vetoes(match)
+            if counts['ok'] - ok_before != len(match.vetoes):
+                problems.append(f"{counts['ok'] - ok_before} erfolgreiche Klicks, aber {len(match.vetoes)} Vetos")
+            failures.extend(f"Runde {r + 1}: {p}" for p in problems)
+    elapsed = time.perf_counter() - started
+
+    kind = 'Liga' if args.league else 'Turnier'
+    print(f"🔨 {kind}-Lobby, {args.threads} Threads, {args.rounds} Runden in {elapsed:.1f}s")
+    print(f"   übernommen {counts['ok']:>6}   abgelehnt {counts['error']:>6}   "
+          f"409-Konflikte {counts['409']:>6}   aufgegeben {counts['aufgegeben']:>4}")
+
+    if failures:
+        for failure in failures[:20]:
+            print(f"❌ {failure}")
+        return 1
+    print("✅ Alle Lobbys vollständig und in der richtigen Reihenfolge – kein Veto verloren.")
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--league', action='store_true', help='Liga-Lobby statt Turnier-Match')
+    parser.add_argument('--threads', type=int, default=12)
+    parser.add_argument('--rounds', type=int, default=5)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,166 @@
+"""
+Concurrency-Stresstest für SQLite gegen eine temporäre Datenbank.
+
+    python bench_sqlite.py                  # Einstellungen aus Config (WAL, busy_timeout, ...)
+    python bench_sqlite.py --baseline       # SQLite-Defaults (Rollback-Journal, FULL) zum Vergleich
+    python bench_sqlite.py --seconds 10 --writers 8 --readers 24
+
+Simuliert eine heiße Match-Lobby: Schreiber klicken Vetos und posten Chat-Nachrichten
+(je ein Commit), Leser pollen wie die Live-Streams Status-Version und neue Nachrichten.
+Gezählt werden erfolgreiche Operationen, "database is locked"-Fehler, Versionskonflikte
+(paralleler Veto-Klick, StaleDataError -> neu lesen und erneut versuchen) und Latenzen.
+Exit-Code 1, wenn Lock-Fehler auftreten oder ein Thread abbricht.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+import config
+
+# SQLite-Defaults bzw. das Verhalten vor dem Tuning (pysqlite wartet von sich aus 5 s)
+BASELINE = {
+    'SQLITE_JOURNAL_MODE': 'DELETE',
+    'SQLITE_BUSY_TIMEOUT': 5000,
+    'SQLITE_SYNCHRONOUS': 'FULL',
+    'SQLITE_CACHE_SIZE': -2000,
+    'SQLITE_MMAP_SIZE': 0,
+}
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+def main(args):
+    tmp = tempfile.mkdtemp()
+    config.Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'stress.db')
+    config.Config.SQLALCHEMY_ENGINE_OPTIONS = {'pool_size': args.writers + args.readers, 'max_overflow': 0}
+    config.Config.PASSWORD_HASH_WORKERS = 0
+    if args.baseline:
+        for key, value in BASELINE.items():
+            setattr(config.Config, key, value)
+
+    from sqlalchemy import select
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.orm.exc import StaleDataError
+    from app import create_app
+    from app.extensions import db
+    from app.models import Tournament, Match, ChatMessage
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        t = Tournament(name='Stress')
+        db.session.add(t)
+        match = Match(team_a='Alpha', team_b='Bravo', state='ban_1_a', round_number=1, match_index=0)
+        t.matches.append(match)
+        db.session.commit()
+        match_id = match.id
+        mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+
+    stats = {'write': [], 'read': []}
+    errors = {'write': 0, 'read': 0}
+    conflicts = [0]
+    crashed = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.seconds
+    states = ['ban_1_a', 'ban_1_b', 'ban_2_a', 'ban_2_b']
+
+    def record(kind, started, failed=False):
+        elapsed = time.perf_counter() - started
+        with lock:
+            if failed:
+                errors[kind] += 1
+            else:
+                stats[kind].append(elapsed)
+
+    def writer(n):
+        with app.app_context():
+            i = 0
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    if n % 2 == 0:
+                        # Veto-Klick: Match laden, Phase weiterschalten
+                        m = db.session.get(Match, match_id)
+                        m.state = states[(states.index(m.state) + 1) % len(states)]
+                    else:
+                        db.session.add(ChatMessage(match_id=match_id, username=f'Spieler{n}', message=f'gg {i}'))
+                    db.session.commit()
+                    record('write', started)
+                except StaleDataError:
+                    # Anderer Schreiber war schneller: nächste Runde liest das Match neu
+                    db.session.rollback()
+                    with lock:
+                        conflicts[0] += 1
+                except OperationalError:
+                    db.session.rollback()
+                    record('write', started, failed=True)
+                i += 1
+
+    def reader(n):
+        with app.app_context():
+            after_id = 0
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    db.session.scalar(select(Match.state_version).where(Match.id == match_id))
+                    ids = db.session.scalars(select(ChatMessage.id).where(
+                        ChatMessage.match_id == match_id, ChatMessage.id > after_id).order_by(ChatMessage.id)).all()
+                    after_id = ids[-1] if ids else after_id
+                    db.session.close()
+                    record('read', started)
+                except OperationalError:
+                    db.session.rollback()
+                    record('read', started, failed=True)
+                time.sleep(0.005)
+
+    def guarded(fn, n):
+        # Unerwartete Ausnahme beendet nur diesen Thread – merken, damit der Exit-Code stimmt
+        try:
+            fn(n)
+        except Exception:
+            traceback.print_exc()
+            with lock:
+                crashed.append(f"{fn.__name__} {n}")
+
+    threads = [threading.Thread(target=guarded, args=(writer, n)) for n in range(args.writers)]
+    threads += [threading.Thread(target=guarded, args=(reader, n)) for n in range(args.readers)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+
+    print(f"🗄️  journal_mode={mode}, {args.writers} Schreiber, {args.readers} Leser, {args.seconds}s")
+    print(f"{'':>8} {'OK':>8} {'Locked':>8} {'ops/s':>8} {'p50':>9} {'p95':>9} {'max':>9}")
+    for kind in ('write', 'read'):
+        values = stats[kind]
+        print(f"{kind:>8} {len(values):>8} {errors[kind]:>8} {len(values) / args.seconds:>8.0f} "
+              f"{_percentile(values, 0.5) * 1000:>7.1f}ms {_percentile(values, 0.95) * 1000:>7.1f}ms "
+              f"{max(values, default=0) * 1000:>7.1f}ms")
+    print(f"   Versionskonflikte (parallele Vetos, wiederholt): {conflicts[0]}")
+
+    if crashed:
+        print(f"❌ Threads abgebrochen: {', '.join(crashed)}")
+        return 1
+    if errors['write'] or errors['read']:
+        print("❌ 'database is locked'-Fehler aufgetreten.")
+        return 1
+    print("✅ Keine Lock-Fehler.")
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--baseline', action='store_true', help='SQLite-Defaults statt Config-Tuning')
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--writers', type=int, default=6)
+    parser.add_argument('--readers', type=int, default=16)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,78 @@
+"""
+Startzeit-Report: misst in frischen Interpretern, was ein Worker beim Kaltstart bezahlt.
+
+    python bench_startup.py          # 5 Läufe, Median
+    python bench_startup.py 10       # eigene Anzahl Läufe
+
+Gemessen werden `import app`, `create_app()` und – getrennt davon – der Import des
+Firebase Admin SDK, den erst der erste Push-Versand auslöst. Zusätzlich: Speicher (Max-RSS)
+nach dem Start und die teuersten Top-Level-Imports laut `python -X importtime`.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+PROBE = r"""
+import json, resource, sys, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+application = app.create_app()
+t2 = time.perf_counter()
+rss_app = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+firebase_loaded = 'firebase_admin' in sys.modules
+import firebase_admin, firebase_admin.messaging
+t3 = time.perf_counter()
+rss_firebase = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({'import': t1 - t0, 'create_app': t2 - t1, 'firebase': t3 - t2,
+                  'rss_app': rss_app, 'rss_firebase': rss_firebase,
+                  'firebase_at_startup': firebase_loaded}))
+"""
+
+
+def _run(code, *flags):
+    return subprocess.run([sys.executable, *flags, '-c', code], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+
+
+def top_imports(limit=8):
+    """Importzeit beim `import app`, summiert pro Top-Level-Paket (Eigenzeit aller Module)."""
+    totals = {}
+    for line in _run('import app', '-X', 'importtime').stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        totals[package] = totals.get(package, 0) + int(self_us)
+    return sorted(((us, package) for package, us in totals.items()), reverse=True)[:limit]
+
+
+def main(runs):
+    samples = [json.loads(_run(PROBE).stdout.strip().splitlines()[-1]) for _ in range(runs)]
+    median = {key: statistics.median(s[key] for s in samples)
+              for key in ('import', 'create_app', 'firebase', 'rss_app', 'rss_firebase')}
+
+    print(f"🚀 Kaltstart ({runs} Läufe, Median)")
+    print(f"   import app          {median['import'] * 1000:>7.1f} ms")
+    print(f"   create_app()        {median['create_app'] * 1000:>7.1f} ms")
+    print(f"   Worker bereit       {(median['import'] + median['create_app']) * 1000:>7.1f} ms"
+          f"   ({median['rss_app'] / 1024:.1f} MB RSS)")
+    print(f"   + Firebase SDK      {median['firebase'] * 1000:>7.1f} ms"
+          f"   (+{(median['rss_firebase'] - median['rss_app']) / 1024:.1f} MB, erst beim ersten Push)")
+
+    if any(s['firebase_at_startup'] for s in samples):
+        print("⚠️ firebase_admin wird schon beim Start importiert!")
+    else:
+        print("✅ firebase_admin wird erst beim ersten Versand geladen.")
+
+    print("\n📦 Teuerste Pakete (import app):")
+    for us, package in top_imports():
+        print(f"   {us / 1000:>7.1f} ms  {package}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
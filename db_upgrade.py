@@ -0,0 +1,146 @@
+"""
+Schema-Upgrade für eine LAUFENDE Datenbank (ohne Export/Import wie migration.py).
+
+    python db_upgrade.py           # fehlende Tabellen, Spalten und Indizes anlegen
+    python db_upgrade.py --check   # Query-Pläne der Hot-Paths prüfen (Exit-Code 1 bei Full Scan)
+"""
+import sys
+from datetime import datetime
+from sqlalchemy import inspect, select, desc, MetaData
+
+from app import create_app
+from app.extensions import db
+from app.models import (User, League, LeagueMatch, LeagueStanding, CupMatch, Match, ChatMessage,
+                        CupChatMessage, LeagueChatMessage, Ticket, TeamMember, MapVeto)
+from app.standings import rebuild_league_standings
+from migration import backfill_team_ids, backfill_map_vetoes, backfill_token_hashes
+
+# Indizes früherer Versionen, die durch neue ersetzt wurden
+OBSOLETE_INDEXES = {
+    'user': ['ix_user_token'],
+    'chat_message': ['ix_chat_message_match_time'],
+    'cup_chat_message': ['ix_cup_chat_message_match_time'],
+    'league_chat_message': ['ix_league_chat_message_match_time'],
+}
+
+
+def _add_missing_columns(conn, table, existing):
+    for col in table.columns:
+        if col.name in existing:
+            continue
+        if not col.nullable and col.server_default is None:
+            print(f"⚠️  {table.name}.{col.name}: NOT NULL ohne Server-Default, bitte migration.py nutzen.")
+            continue
+        col_type = col.type.compile(dialect=conn.dialect)
+        if col.server_default is not None:
+            default = col.server_default.arg
+            default = f"'{default}'" if isinstance(default, str) else str(default)
+            col_type += f' DEFAULT {default}' + ('' if col.nullable else ' NOT NULL')
+        ref = ''
+        fk = next(iter(col.foreign_keys), None)
+        if fk is not None:
+            ref = f' REFERENCES "{fk.column.table.name}"({fk.column.name})'
+        conn.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN "{col.name}" {col_type}{ref}')
+        print(f"   + Spalte {table.name}.{col.name}")
+
+
+def upgrade_schema():
+    print("🚀 Starte Schema-Upgrade...")
+    with db.engine.begin() as conn:
+        insp = inspect(conn)
+        existing_tables = set(insp.get_table_names())
+
+        # Neue Tabellen komplett anlegen (inkl. ihrer Indizes)
+        db.metadata.create_all(bind=conn, checkfirst=True)
+
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                print(f"✅ Tabelle '{table.name}' angelegt.")
+                continue
+            _add_missing_columns(conn, table, {c['name'] for c in insp.get_columns(table.name)})
+            existing_indexes = {i['name'] for i in insp.get_indexes(table.name)}
+            for name in OBSOLETE_INDEXES.get(table.name, []):
+                if name in existing_indexes:
+                    conn.exec_driver_sql(f'DROP INDEX "{name}"')
+                    print(f"   - Index {name}")
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(bind=conn)
+                    print(f"   + Index {index.name}")
+
+        # Neue FK-Spalten der Match-Tabellen aus den Team-Namen füllen
+        live_meta = MetaData()
+        live_meta.reflect(bind=conn)
+        backfill_team_ids(conn, live_meta)
+        # Klartext-Tokens -> token_hash, danach geleert (einmalig; nach einem SECRET_KEY-Wechsel
+        # müssen Tokens neu erzeugt werden)
+        backfill_token_hashes(conn, live_meta)
+        # Alte JSON-Spalten (noch physisch vorhanden) -> map_veto, danach geleert (einmalig)
+        backfill_map_vetoes(conn, live_meta, conn, live_meta, clear_source=True)
+
+    # Ligen ohne materialisierte Tabelle (Altbestand) einmalig aufbauen
+    has_table = select(LeagueStanding.id).where(LeagueStanding.league_id == League.id).exists()
+    for league in League.query.filter(~has_table).all():
+        if league.get_participants():
+            rebuild_league_standings(league)
+            print(f"   + Tabelle für Liga '{league.name}'")
+    db.session.commit()
+
+    print("🏁 Schema-Upgrade abgeschlossen.")
+
+
+def hot_queries():
+    """Die Queries, die pro Request/Poll laufen. Jede muss über einen Index laufen."""
+    now = datetime.now()
+    return {
+        'auth.login (user)': select(User).where(User.username == 'Team'),
+        'auth.login (token)': select(User).where(User.token_hash == 'ab' * 32),
+        'league_details (matches)': select(LeagueMatch).where(LeagueMatch.league_id == 1),
+        'league week': select(LeagueMatch).where(LeagueMatch.league_id == 1, LeagueMatch.match_week == 1),
+        'league state': select(LeagueMatch).where(LeagueMatch.state == 'conflict'),
+        'cup_details (matches)': select(CupMatch).where(CupMatch.cup_id == 1),
+        'tournament_tree (matches)': select(Match).where(Match.tournament_id == 1),
+        'bracket feeder': select(Match).where(Match.next_match_id == 1),
+        'match chat': select(ChatMessage).where(ChatMessage.match_id == 1, ChatMessage.id > 1).order_by(ChatMessage.id),
+        'cup chat': select(CupChatMessage).where(CupChatMessage.cup_match_id == 1, CupChatMessage.id > 1).order_by(CupChatMessage.id),
+        'league chat': select(LeagueChatMessage).where(LeagueChatMessage.league_match_id == 1, LeagueChatMessage.id > 1).order_by(LeagueChatMessage.id),
+        'my tickets': select(Ticket).where(Ticket.author_id == 1).order_by(desc(Ticket.updated_at)),
+        'dashboard bans': select(TeamMember).where(TeamMember.banned_until > now),
+        'my league matches': select(LeagueMatch).where(LeagueMatch.team_a_id == 1),
+        'league veto': select(MapVeto).where(MapVeto.league_match_id == 1).order_by(MapVeto.seq),
+        'map ban stats': select(MapVeto).where(MapVeto.map_id == 1, MapVeto.action == 'ban'),
+    }
+
+
+def _plan_problems(conn, stmt):
+    """Gibt die Zeilen des SQLite-Query-Plans zurück, die auf einen Full Scan oder Sort hindeuten."""
+    compiled = stmt.compile(dialect=conn.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + str(compiled), params).fetchall()
+    details = [row[-1] for row in rows]
+    return [d for d in details
+            if (d.startswith('SCAN ') and 'USING' not in d) or 'TEMP B-TREE' in d]
+
+
+def check_query_plans():
+    failures = 0
+    with db.engine.connect() as conn:
+        if conn.dialect.name != 'sqlite':
+            print(f"⚠️  Plan-Check ist nur für SQLite implementiert (aktiv: {conn.dialect.name}).")
+            return True
+        for name, stmt in hot_queries().items():
+            problems = _plan_problems(conn, stmt)
+            if problems:
+                failures += 1
+                print(f"❌ {name}: {'; '.join(problems)}")
+            else:
+                print(f"✅ {name}")
+    return failures == 0
+
+
+if __name__ == '__main__':
+    app = create_app()
+    with app.app_context():
+        if '--check' in sys.argv:
+            sys.exit(0 if check_query_plans() else 1)
+        upgrade_schema()
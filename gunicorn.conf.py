@@ -0,0 +1,58 @@
+"""
+Gunicorn-Konfiguration (Produktivbetrieb). Alle Werte per Umgebungsvariable änderbar.
+
+Worker-Dimensionierung für SQLite
+---------------------------------
+SQLite erlaubt beliebig viele Leser, aber immer nur EINEN Schreiber pro Datenbankdatei.
+Mehr Prozesse bringen daher keinen höheren Schreibdurchsatz, sondern nur mehr Wartezeit
+auf den Datei-Lock. Zusätzlich ist der Live-Bus prozessweit (User- und Dashboard-Cache prüfen
+bei jedem Treffer den aktuellen Stand in der DB): Ein Commit in Worker A weckt die SSE-Streams
+in Worker B erst bei deren nächstem Re-Check (SSE_POLL_SECONDS, Standard 2 s). Empfehlung deshalb:
+
+    WEB_WORKERS = 2          # wenige Prozesse (Ausfallsicherheit, Hashing läuft im Thread-Pool)
+    WEB_THREADS = 32         # viele Threads: jeder offene Live-Stream (SSE) belegt einen Thread
+    SSE_MAX_STREAMS = 24     # davon höchstens so viele für Streams, der Rest bleibt für Requests
+
+Obergrenze Live-Zuschauer: WEB_WORKERS × SSE_MAX_STREAMS (Standard 48). Wer darüber liegt, bekommt
+503 und die Lobby pollt alle 3 s. SSE_MAX_STREAMS muss kleiner als WEB_THREADS bleiben; für mehr
+Zuschauer beide erhöhen. Ein Stream endet spätestens nach SSE_STREAM_LIFETIME und verbindet neu.
+
+Mit PostgreSQL (DATABASE_URL) entfällt der Schreib-Lock: WEB_WORKERS darf mit den CPU-Kernen
+wachsen. Dabei gilt WEB_WORKERS × (DB_POOL_SIZE + DB_MAX_OVERFLOW) < max_connections der DB.
+
+Graceful Reload: `kill -HUP <master-pid>` (Docker: `docker compose kill -s HUP tournament-app`)
+startet neue Worker mit frischem Code; alte Worker beenden laufende Requests innerhalb von
+WEB_GRACEFUL_TIMEOUT. Offene SSE-Streams werden dabei getrennt, der Browser verbindet sich
+automatisch neu.
+"""
+import os
+
+bind = os.environ.get('WEB_BIND', '0.0.0.0:5000')
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_WORKERS', 2))
+threads = int(os.environ.get('WEB_THREADS', 32))
+
+# Keep-Alive für Browser/Reverse-Proxy; Timeout = Heartbeat des Workers (SSE blockiert ihn nicht)
+keepalive = int(os.environ.get('WEB_KEEPALIVE', 5))
+timeout = int(os.environ.get('WEB_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+
+# Worker nach N Requests neu starten (0 = nie), Jitter verhindert gleichzeitige Neustarts
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 5000))
+max_requests_jitter = int(os.environ.get('WEB_MAX_REQUESTS_JITTER', 500))
+
+accesslog = os.environ.get('WEB_ACCESS_LOG', '-')
+errorlog = '-'
+
+
+def on_starting(server):
+    """Einmal im Master vor dem Forken: fehlende Tabellen anlegen."""
+    from app import create_app
+    from app.extensions import db
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        # Keine offenen Verbindungen an die Worker vererben
+        db.engine.dispose()
+    print("✅ Datenbank-Tabellen geprüft.")
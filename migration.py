@@ -1,22 +1,154 @@
-from sqlalchemy import create_engine, MetaData, Table, select, text
+from sqlalchemy import create_engine, MetaData, Table, select, text, bindparam, func, or_, Integer
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+import json
 import os
+from app.utils import hash_token
+from config import database_url
 
 # Konfiguration
 OLD_DB_PATH = os.path.abspath("./instance/tournament.db.old")
 NEW_DB_PATH = os.path.abspath("./instance/tournament.db")
 
-# Connection Strings
-OLD_DB_URI = f"sqlite:///{OLD_DB_PATH}"
-NEW_DB_URI = f"sqlite:///{NEW_DB_PATH}"
+# Connection Strings: Standard SQLite-Dateien, per OLD_DATABASE_URL / DATABASE_URL z.B. PostgreSQL
+# (auch gemischt, etwa SQLite-Backup -> PostgreSQL)
+OLD_DB_URI = database_url(os.environ.get('OLD_DATABASE_URL', f"sqlite:///{OLD_DB_PATH}"))
+NEW_DB_URI = database_url(os.environ.get('DATABASE_URL', f"sqlite:///{NEW_DB_PATH}"))
+
+# Match-Tabellen, deren Team-Namen auf User-IDs abgebildet werden
+MATCH_TABLES = ('match', 'cup_match', 'league_match')
+
+def backfill_team_ids(conn, meta):
+    """Füllt team_a_id/team_b_id anhand der gespeicherten Team-Namen (nur leere Felder)."""
+    user = meta.tables.get('user')
+    if user is None:
+        return
+    for table_name in MATCH_TABLES:
+        table = meta.tables.get(table_name)
+        if table is None or 'team_a_id' not in table.c:
+            continue
+        for side in ('a', 'b'):
+            name_col = table.c[f'team_{side}']
+            id_col = table.c[f'team_{side}_id']
+            user_id = select(user.c.id).where(user.c.username == name_col).scalar_subquery()
+            result = conn.execute(table.update().where(id_col.is_(None)).values({id_col.name: user_id}))
+            print(f"   -> {table_name}.{id_col.name}: {result.rowcount} Zeilen verknüpft.")
+
+# Match-Tabelle -> FK-Spalte in map_veto
+VETO_FKS = {'match': 'match_id', 'cup_match': 'cup_match_id', 'league_match': 'league_match_id'}
+
+def backfill_token_hashes(conn, meta):
+    """Hasht verbliebene Klartext-Tokens nach user.token_hash und leert danach user.token."""
+    user = meta.tables.get('user')
+    if user is None or 'token_hash' not in user.c:
+        return
+    rows = conn.execute(select(user.c.id, user.c.token).where(user.c.token.isnot(None))).all()
+    if rows:
+        conn.execute(user.update().where(user.c.id == bindparam('uid'))
+                     .values(token_hash=bindparam('hash'), token=None),
+                     [{'uid': r.id, 'hash': hash_token(r.token)} for r in rows])
+    print(f"   -> user.token_hash: {len(rows)} Tokens gehasht, Klartext entfernt.")
+
+def _json_list(data):
+    try:
+        value = json.loads(data) if data else []
+    except (TypeError, ValueError):
+        return []
+    return value if isinstance(value, list) else []
+
+def backfill_map_vetoes(src_conn, src_meta, dst_conn, dst_meta, clear_source=False):
+    """
+    Überträgt die alten JSON-Spalten banned_maps/picked_maps in map_veto-Zeilen.
+    Matches, die bereits Veto-Zeilen haben, werden übersprungen.
+    clear_source=True (Upgrade in derselben DB) leert die JSON-Spalten danach, damit ein
+    erneuter Lauf keine inzwischen gelöschten Vetos (z.B. Bracket-Reset) zurückholt.
+    """
+    veto = dst_meta.tables.get('map_veto')
+    if veto is None:
+        return
+    map_table = dst_meta.tables['map']
+    map_ids = dict(dst_conn.execute(select(map_table.c.name, map_table.c.id)).all())
+
+    for table_name, fk in VETO_FKS.items():
+        src = src_meta.tables.get(table_name)
+        if src is None or 'picked_maps' not in src.c:
+            continue
+        done = {r[0] for r in dst_conn.execute(select(veto.c[fk]).where(veto.c[fk].isnot(None)).distinct())}
+        json_cols = [c for c in ('banned_maps', 'picked_maps') if c in src.c]
+
+        rows = []
+        for row in src_conn.execute(select(src.c.id, *(src.c[c] for c in json_cols))):
+            if row.id in done:
+                continue
+            seq = 0
+            for col in json_cols:
+                action = 'ban' if col == 'banned_maps' else 'pick'
+                for i, name in enumerate(_json_list(row._mapping[col])):
+                    if not name:
+                        continue
+                    # Veto-Reihenfolge: je 2 Aktionen A, dann 2 B (Cup-Maps wählt der Admin)
+                    team = None if table_name == 'cup_match' else ('a' if (i // 2) % 2 == 0 else 'b')
+                    rows.append({fk: row.id, 'seq': seq, 'action': action, 'team': team,
+                                 'map_name': name, 'map_id': map_ids.get(name)})
+                    seq += 1
+        if rows:
+            dst_conn.execute(veto.insert(), rows)
+        print(f"   -> {table_name}: {len(rows)} Veto-Aktionen übernommen.")
+        if clear_source:
+            src_conn.execute(src.update().where(or_(*(src.c[c] != '[]' for c in json_cols)))
+                             .values({c: '[]' for c in json_cols}))
+
+def _missing_sqlite_file(uri):
+    """Pfad einer nicht vorhandenen SQLite-Datei, sonst None (Server-DBs melden Fehler beim Verbinden)."""
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite' and url.database and not os.path.exists(url.database):
+        return url.database
+    return None
+
+def disable_foreign_keys(conn):
+    """FK-Prüfung für den Import aus (alte SQLite-Daten können verwaiste Zeilen enthalten)."""
+    if conn.dialect.name == 'sqlite':
+        conn.execute(text("PRAGMA foreign_keys=OFF"))
+    elif conn.dialect.name == 'postgresql':
+        # Schaltet die FK-Trigger bis zum Commit ab; erfordert Superuser/Owner-Rechte
+        try:
+            with conn.begin_nested():
+                conn.execute(text("SET LOCAL session_replication_role = replica"))
+        except DBAPIError:
+            print("⚠️  FK-Prüfung kann nicht abgeschaltet werden (keine Rechte) – verwaiste Zeilen brechen den Import ab.")
+
+def enable_foreign_keys(conn):
+    if conn.dialect.name == 'sqlite':
+        conn.execute(text("PRAGMA foreign_keys=ON"))
+    elif conn.dialect.name == 'postgresql':
+        conn.execute(text("SET LOCAL session_replication_role = DEFAULT"))
+
+def reset_sequences(conn, meta):
+    """PostgreSQL: Sequenzen hinter die importierten IDs setzen, sonst kollidieren neue INSERTs."""
+    if conn.dialect.name != 'postgresql':
+        return
+    for table in meta.sorted_tables:
+        pk = list(table.primary_key.columns)
+        if len(pk) != 1 or not isinstance(pk[0].type, Integer):
+            continue
+        table_name = conn.dialect.identifier_preparer.format_table(table)
+        sequence = conn.execute(text("SELECT pg_get_serial_sequence(:t, :c)"),
+                                {'t': table_name, 'c': pk[0].name}).scalar()
+        if sequence:
+            max_id = conn.execute(select(func.max(pk[0]))).scalar()
+            conn.execute(text("SELECT setval(:s, :v, :called)"),
+                         {'s': sequence, 'v': max_id or 1, 'called': max_id is not None})
 
 def migrate():
     print("🚀 Starte VOLLSTÄNDIGE Migration (Alles wird überschrieben)...")
 
-    if not os.path.exists(OLD_DB_PATH):
-        print(f"❌ FEHLER: Alte DB nicht gefunden: {OLD_DB_PATH}")
+    missing = _missing_sqlite_file(OLD_DB_URI)
+    if missing:
+        print(f"❌ FEHLER: Alte DB nicht gefunden: {missing}")
         return
-    if not os.path.exists(NEW_DB_PATH):
-        print(f"❌ FEHLER: Neue DB nicht gefunden: {NEW_DB_PATH}")
+    missing = _missing_sqlite_file(NEW_DB_URI)
+    if missing:
+        print(f"❌ FEHLER: Neue DB nicht gefunden: {missing}")
         return
 
     # Engines erstellen
@@ -34,10 +166,19 @@ def migrate():
     with old_engine.connect() as old_conn, new_engine.begin() as new_conn:
         
         # Foreign Keys ausschalten (wichtig beim Leeren der Tabellen)
-        new_conn.execute(text("PRAGMA foreign_keys=OFF"))
+        disable_foreign_keys(new_conn)
+
+        # 1. ZIEL-TABELLEN KOMPLETT LEEREN (abhängige Tabellen zuerst)
+        # Damit stellen wir sicher, dass ALLE alten Daten Platz haben
+        # und keine "Unique Constraint" Fehler auftreten.
+        for new_table in reversed(new_meta.sorted_tables):
+            if new_table.name in old_meta.tables:
+                new_conn.execute(new_table.delete())
+
+        # Eltern-Tabellen vor abhängigen Tabellen befüllen
+        for new_table in new_meta.sorted_tables:
+            table_name = new_table.name
 
-        for table_name, new_table in new_meta.tables.items():
-            
             # Check: Existiert Tabelle im Backup?
             if table_name not in old_meta.tables:
                 print(f"⚠️  Tabelle '{table_name}' fehlt im Backup. Überspringe...")
@@ -54,11 +195,6 @@ def migrate():
 
             print(f"✅ Migriere '{table_name}'...")
 
-            # 1. ZIEL-TABELLE KOMPLETT LEEREN
-            # Damit stellen wir sicher, dass ALLE alten Daten Platz haben
-            # und keine "Unique Constraint" Fehler auftreten.
-            new_conn.execute(new_table.delete())
-
             # 2. ALTE DATEN HOLEN
             sel_stmt = select(*(old_table.c[col] for col in common_columns))
             rows = old_conn.execute(sel_stmt).fetchall()
@@ -74,8 +210,23 @@ def migrate():
             else:
                 print("   -> Tabelle war leer.")
 
+        # Team-Namen -> User-IDs (neue FK-Spalten)
+        print("🔗 Verknüpfe Match-Teams mit User-IDs...")
+        backfill_team_ids(new_conn, new_meta)
+
+        # Team-Tokens -> indexierter Hash für den Login
+        print("🔑 Hashe Team-Tokens...")
+        backfill_token_hashes(new_conn, new_meta)
+
+        # JSON-Pick/Ban -> map_veto
+        print("🗺️  Übertrage Map-Vetos...")
+        backfill_map_vetoes(old_conn, old_meta, new_conn, new_meta)
+
+        # Auto-Increment hinter die übernommenen IDs setzen (PostgreSQL)
+        reset_sequences(new_conn, new_meta)
+
         # Foreign Keys wieder an
-        new_conn.execute(text("PRAGMA foreign_keys=ON"))
+        enable_foreign_keys(new_conn)
 
     print("\n🏁 Migration abgeschlossen! Alle alten Daten sind jetzt aktiv.")
 
@@ -19,6 +19,12 @@ git pull
 if [ -f "$DB_PATH" ]; then
     echo "📦 Verschiebe alte Datenbank zu $DB_OLD_PATH..."
     mv "$DB_PATH" "$DB_OLD_PATH"
+    # WAL-Modus: nicht eingespielte Änderungen liegen in -wal/-shm und gehören zur alten DB
+    for SUFFIX in -wal -shm; do
+        if [ -f "$DB_PATH$SUFFIX" ]; then
+            mv "$DB_PATH$SUFFIX" "$DB_OLD_PATH$SUFFIX"
+        fi
+    done
 else
     echo "⚠️  Keine Datenbank unter $DB_PATH gefunden. Überspringe Backup."
 fi
@@ -0,0 +1,10 @@
+"""
+WSGI-Einstiegspunkt für den Produktivbetrieb:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Die Tabellen legt gunicorn.conf.py einmal im Master-Prozess an, nicht jeder Worker.
+"""
+from app import create_app
+
+app = create_app()